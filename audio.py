@@ -0,0 +1,119 @@
+# audio.py
+# Non-blocking scan feedback — tones rendered to in-memory WAVs once, played on a worker thread
+import io
+import math
+import struct
+import sys
+import threading
+import time
+import wave
+
+try:
+    import winsound
+except ImportError:  # Linux / macOS: terminal bell
+    winsound = None
+
+SAMPLE_RATE = 22050
+MIN_GAP = 0.08  # seconds; requests arriving while a tone plays collapse into one
+
+# tone name → [(frequency Hz or 0 for silence, milliseconds), ...]
+TONES = {
+    "scan": [(3000, 130)],
+    "match": [(2400, 70), (0, 30), (3200, 110)],
+    "no_match": [(700, 220)],
+    "unknown": [(1800, 80), (0, 40), (1800, 80)],
+    "auth": [(3000, 130), (0, 60), (3000, 130)],
+}
+
+
+def render_wav(segments, rate=SAMPLE_RATE, volume=0.45):
+    """16-bit mono WAV bytes for a list of (freq, ms) segments, with 5 ms fades against clicks"""
+    frames = bytearray()
+    fade = int(rate * 0.005)
+    for freq, ms in segments:
+        n = int(rate * ms / 1000)
+        if not freq:
+            frames += bytes(2 * n)
+            continue
+        step = 2 * math.pi * freq / rate
+        ramp = max(min(fade, n // 2), 1)
+        for i in range(n):
+            env = min(1.0, i / ramp, (n - 1 - i) / ramp)
+            frames += struct.pack("<h", int(32767 * volume * env * math.sin(step * i)))
+    out = io.BytesIO()
+    with wave.open(out, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(rate)
+        w.writeframes(bytes(frames))
+    return out.getvalue()
+
+
+class Beeper:
+    """play(name) returns immediately; one worker thread owns the sound device.
+
+    Only the newest pending request is kept, so a burst of scans produces one
+    beep instead of a queue of them, and tones never overlap.
+    """
+
+    def __init__(self, tones=None, min_gap=MIN_GAP):
+        self.sounds = {name: render_wav(segs) for name, segs in {**TONES, **(tones or {})}.items()}
+        self.min_gap = min_gap
+        self.enabled = True
+        self.played = 0
+        self.merged = 0
+        self._pending = None
+        self._cond = threading.Condition()
+        self._thread = threading.Thread(target=self._worker, name="beeper", daemon=True)
+        self._thread.start()
+
+    def play(self, name="scan"):
+        if not self.enabled or name not in self.sounds:
+            return
+        with self._cond:
+            if self._pending is not None:
+                self.merged += 1
+            self._pending = name
+            self._cond.notify()
+
+    def _worker(self):
+        last_end = 0.0
+        while True:
+            with self._cond:
+                while self._pending is None:
+                    self._cond.wait()
+                name, self._pending = self._pending, None
+            gap = self.min_gap - (time.monotonic() - last_end)
+            if gap > 0:
+                time.sleep(gap)
+            self._play_now(name)
+            self.played += 1
+            last_end = time.monotonic()
+
+    def _play_now(self, name):
+        try:
+            if winsound is not None:
+                winsound.PlaySound(self.sounds[name], winsound.SND_MEMORY | winsound.SND_NODEFAULT)
+            else:
+                sys.stdout.write("\a")
+                sys.stdout.flush()
+        except:
+            pass
+
+
+def scan_tone(info, original_uid=None):
+    """Tone for a classified scan: clone check result first, then unknown vs known tag"""
+    if original_uid:
+        return "match" if info["uid"] == original_uid else "no_match"
+    return "unknown" if info["type"].upper().startswith("UNKNOWN") else "scan"
+
+
+_beeper = None
+
+
+def get_beeper(tones=None):
+    """Process-wide Beeper (tones only apply on first call)"""
+    global _beeper
+    if _beeper is None:
+        _beeper = Beeper(tones)
+    return _beeper
@@ -0,0 +1,61 @@
+# bench_codec.py
+# d4_codec.Decoder throughput — frames/sec and bytes/sec on corpus and synthetic streams
+#   python benchmarks/bench_codec.py [--chunk 64] [--size 1000000]
+import argparse
+import os
+import random
+import sys
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+sys.path.insert(0, HERE)
+from d4_codec import Decoder, extract_uid, uid_frame
+from d4_corpus import load, noise
+
+
+def synthetic(size, noise_ratio, seed=1):
+    rng = random.Random(seed)
+    out = bytearray()
+    while len(out) < size:
+        if rng.random() < noise_ratio:
+            out += noise(rng, rng.randint(16, 256))
+        else:
+            out += uid_frame(rng.randbytes(4 if rng.random() < 0.8 else 7))
+    return bytes(out[:size])
+
+
+def measure(stream, chunk, repeat=3):
+    """Best of `repeat` runs: (seconds, frames)"""
+    best = None
+    for _ in range(repeat):
+        dec = Decoder()
+        frames = 0
+        t0 = time.perf_counter()
+        for i in range(0, len(stream), chunk):
+            for frame in dec.feed(stream[i:i + chunk]):
+                extract_uid(frame.payload)
+                frames += 1
+        elapsed = time.perf_counter() - t0
+        best = elapsed if best is None else min(best, elapsed)
+    return best, frames
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="D4 codec throughput benchmark")
+    ap.add_argument("--chunk", type=int, default=64, help="bytes per feed() call (a typical serial read)")
+    ap.add_argument("--size", type=int, default=1_000_000, help="synthetic stream size in bytes")
+    args = ap.parse_args(argv)
+
+    streams = [("corpus (all cases)", b"".join(bytes.fromhex(c["stream"]) for c in load()) * 20)]
+    for label, ratio in (("clean", 0.0), ("noisy 20%", 0.2), ("noisy 80%", 0.8)):
+        streams.append((label, synthetic(args.size, ratio)))
+
+    print(f"{'stream':<22}{'bytes':>10}{'frames':>9}{'frames/s':>12}{'MB/s':>8}")
+    for label, stream in streams:
+        elapsed, frames = measure(stream, args.chunk)
+        print(f"{label:<22}{len(stream):>10}{frames:>9}{frames / elapsed:>12.0f}{len(stream) / elapsed / 1e6:>8.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+# bench_suite.py
+# Hot-path benchmarks — frame parsing, classification and tag-DB writes at 1k / 100k / 1M tags
+#   python benchmarks/bench_suite.py [-o results.json] [--sizes 1000,100000] [--compare old.json]
+#   pytest benchmarks/bench_suite.py   (with pytest-benchmark; a plain `pytest` run does not collect this file)
+# Headless: no Qt, no serial device. Tag DBs are built in a temp dir, learned_tags.json is never touched.
+import argparse
+import json
+import os
+import platform
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+import tag_store
+from classifier import classify_tag_smart
+from d4_codec import uid_frame
+from d4_reader import D4Reader
+from tag_store import SqliteTagStore, TagStore, new_record, save_db, save_unknown, set_store
+
+SIZES = (1_000, 100_000, 1_000_000)
+BACKENDS = ("json", "sqlite")
+STREAM_BYTES = 64_000
+CHUNK = 64
+CLASSIFY_BATCH = 1000
+WRITE_BATCH = 100
+MIN_TIME = 0.3      # seconds of timed calls per case (script mode)
+MIN_CALLS = 3
+REGRESSION = 0.25   # --compare flags cases more than 25% slower
+
+
+# ==================== FIXTURES ====================
+def make_stream(noise, size=STREAM_BYTES, seed=1):
+    """UID frames, with `noise` of the bytes line garbage (never 0xAA)"""
+    rng = random.Random(seed)
+    out = bytearray()
+    while len(out) < size:
+        if rng.random() < noise:
+            out += bytes(rng.randrange(0x00, 0xAA) for _ in range(rng.randint(16, 256)))
+        else:
+            out += uid_frame(rng.randbytes(4 if rng.random() < 0.8 else 7))
+    return bytes(out[:size])
+
+
+def make_db(size, seed=2):
+    """`size` tags, every other one labelled"""
+    rng = random.Random(seed)
+    db = {}
+    while len(db) < size:
+        uid = str(rng.randrange(10 ** 10)).zfill(10)
+        rec = new_record("HF 13.56MHz", uid)
+        if len(db) % 2:
+            rec.update(assigned_type="MIFARE Classic", assigned_subtype="S50 1K")
+        db[uid] = rec
+    return db
+
+
+class TempStore:
+    """A populated store of one backend, installed as the process-wide store"""
+
+    def __init__(self, backend, size):
+        self.dir = tempfile.TemporaryDirectory(prefix="d4bench-")
+        self.db = make_db(size)
+        if backend == "json":
+            path = os.path.join(self.dir.name, "tags.json")
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(self.db, f)
+            self.store = TagStore(path)
+        else:
+            self.store = SqliteTagStore(os.path.join(self.dir.name, "tags.db"))
+            self.store.add_many(self.db.items())
+        self.store.get("0")  # load / warm up outside the timing
+        self.previous = set_store(self.store)
+        self.uids = list(self.db)
+        self.fresh = 0
+
+    def new_uids(self, n):
+        """UIDs the DB has never seen (outside the 10-digit range make_db draws from)"""
+        self.fresh += n
+        return [f"X{i:09d}" for i in range(self.fresh - n, self.fresh)]
+
+    def close(self):
+        set_store(self.previous)
+        self.store.close()
+        self.dir.cleanup()
+
+
+# ==================== CASES ====================
+# Each case: setup() -> (fn, items, teardown). fn() is the timed call, `items` what it processes.
+def case_parse(noise):
+    def setup():
+        stream = make_stream(noise)
+        reader = D4Reader("bench", "BENCH")  # never opened; parse_frame only decodes
+
+        def fn():
+            for i in range(0, len(stream), CHUNK):
+                reader.parse_frame(stream[i:i + CHUNK])
+        return fn, len(stream), reader.decoder.reset
+    return setup
+
+
+def case_classify(backend, size):
+    def setup():
+        ts = TempStore(backend, size)
+        rng = random.Random(3)
+        uids = [rng.choice(ts.uids) for _ in range(CLASSIFY_BATCH)]  # all known: no DB writes
+
+        def fn():
+            for uid in uids:
+                classify_tag_smart(uid)
+        return fn, len(uids), ts.close
+    return setup
+
+
+def case_save_unknown(backend, size):
+    def setup():
+        ts = TempStore(backend, size)
+
+        def fn():
+            for uid in ts.new_uids(WRITE_BATCH):
+                save_unknown(uid, "HF 13.56MHz", uid)
+        return fn, WRITE_BATCH, ts.close
+    return setup
+
+
+def case_save_db(backend, size):
+    def setup():
+        ts = TempStore(backend, size)
+        return (lambda: save_db(ts.db)), size, ts.close
+    return setup
+
+
+def case_label(backend, size):
+    """label_tag() minus the dialogs: label, then read the record back"""
+    def setup():
+        ts = TempStore(backend, size)
+        rng = random.Random(4)
+        uids = [rng.choice(ts.uids) for _ in range(WRITE_BATCH)]
+
+        def fn():
+            store = tag_store.get_store()
+            for uid in uids:
+                store.label(uid, "MIFARE Classic", "S50 1K", "bench")
+                store.get(uid)
+        return fn, len(uids), ts.close
+    return setup
+
+
+def cases(sizes=SIZES, backends=BACKENDS):
+    out = {"parse_frame[clean]": case_parse(0.0), "parse_frame[noisy]": case_parse(0.5)}
+    for backend in backends:
+        for size in sizes:
+            tag = f"{backend}-{size}"
+            out[f"classify[{tag}]"] = case_classify(backend, size)
+            out[f"save_unknown[{tag}]"] = case_save_unknown(backend, size)
+            out[f"save_db[{tag}]"] = case_save_db(backend, size)
+            out[f"label[{tag}]"] = case_label(backend, size)
+    return out
+
+
+# ==================== SCRIPT MODE ====================
+def measure(setup, min_time=MIN_TIME, min_calls=MIN_CALLS):
+    fn, items, teardown = setup()
+    try:
+        fn()  # warm-up
+        times = []
+        budget = time.perf_counter() + min_time
+        while len(times) < min_calls or time.perf_counter() < budget:
+            t0 = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - t0)
+    finally:
+        teardown()
+    best = min(times)
+    return {
+        "calls": len(times),
+        "items": items,
+        "min_s": best,
+        "mean_s": statistics.fmean(times),
+        "median_s": statistics.median(times),
+        "per_item_us": best / items * 1e6,
+    }
+
+
+def metadata():
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=HERE,
+                             capture_output=True, text=True).stdout.strip()
+    except OSError:
+        rev = ""
+    return {"git": rev, "python": platform.python_version(), "platform": platform.platform(),
+            "time": time.strftime("%Y-%m-%dT%H:%M:%S")}
+
+
+def compare(old, new, threshold=REGRESSION):
+    """Print per-case speed ratios; returns the names that regressed by more than `threshold`"""
+    slower = []
+    for name, res in new["results"].items():
+        prev = old["results"].get(name)
+        if not prev:
+            continue
+        ratio = res["min_s"] / prev["min_s"]
+        flag = "  << SLOWER" if ratio > 1 + threshold else ""
+        print(f"{name:<32}{prev['per_item_us']:>12.2f}{res['per_item_us']:>12.2f}{ratio:>8.2f}x{flag}")
+        if flag:
+            slower.append(name)
+    return slower
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark the D4 hot paths; results as JSON")
+    ap.add_argument("-o", "--output", default="bench_results.json")
+    ap.add_argument("--sizes", default=",".join(map(str, SIZES)), help="tag DB sizes (default 1000,100000,1000000)")
+    ap.add_argument("--backends", default=",".join(BACKENDS))
+    ap.add_argument("-k", dest="match", default="", help="only cases whose name contains this")
+    ap.add_argument("--compare", metavar="OLD_JSON", help="compare with an earlier run; exit 1 on regressions")
+    ap.add_argument("--threshold", type=float, default=REGRESSION)
+    args = ap.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    selected = {n: s for n, s in cases(sizes, args.backends.split(",")).items() if args.match in n}
+    results = {}
+    print(f"{'case':<32}{'calls':>7}{'min':>12}{'per item':>14}")
+    for name, setup in selected.items():
+        res = results[name] = measure(setup)
+        print(f"{name:<32}{res['calls']:>7}{res['min_s'] * 1000:>10.2f}ms{res['per_item_us']:>12.2f}us", flush=True)
+
+    run = {"meta": metadata(), "results": results}
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(run, f, indent=2)
+    print(f"saved → {args.output}")
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            old = json.load(f)
+        print(f"\n{'case':<32}{'old us':>12}{'new us':>12}{'ratio':>9}")
+        if compare(old, run, args.threshold):
+            return 1
+    return 0
+
+
+# ==================== PYTEST-BENCHMARK ====================
+# `pytest benchmarks/bench_suite.py --benchmark-autosave` / `--benchmark-compare` for the plugin's own history
+try:
+    import pytest
+except ImportError:
+    pytest = None
+
+if pytest is not None:
+    _SIZES = [int(s) for s in os.environ.get("D4_BENCH_SIZES", ",".join(map(str, SIZES))).split(",")]
+
+    @pytest.fixture(params=list(cases(_SIZES)))
+    def hot_path(request):
+        fn, items, teardown = cases(_SIZES)[request.param]()
+        yield fn
+        teardown()
+
+    def test_hot_path(benchmark, hot_path):
+        benchmark(hot_path)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+# d4_corpus.py
+# Recorded + fuzzed D4 byte-stream corpus for the codec, with a regression check
+#   python benchmarks/d4_corpus.py           verify d4_corpus.json against d4_codec
+#   python benchmarks/d4_corpus.py --write   regenerate d4_corpus.json (review the diff!)
+import argparse
+import json
+import os
+import random
+import sys
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.dirname(HERE))
+from d4_codec import Decoder, encode_frame, extract_uid, uid_frame, uid_to_str, CMD_UART_MODE
+
+CORPUS_PATH = os.path.join(HERE, "d4_corpus.json")
+SEED = 4
+
+
+def noise(rng, n):
+    """Line garbage that never contains a header byte"""
+    return bytes(rng.choice(range(0x00, 0xAA)) for _ in range(n))
+
+
+def mutate(rng, data):
+    data = bytearray(data)
+    for _ in range(rng.randint(1, 6)):
+        op = rng.randrange(3)
+        i = rng.randrange(len(data)) if data else 0
+        if op == 0 and data:
+            data[i] ^= 1 << rng.randrange(8)
+        elif op == 1:
+            data[i:i] = rng.randbytes(rng.randint(1, 4))
+        elif data:
+            del data[i:i + rng.randint(1, 4)]
+    return bytes(data)
+
+
+def generate():
+    rng = random.Random(SEED)
+    uid4 = [rng.randbytes(4) for _ in range(64)]
+    uid7 = [rng.randbytes(7) for _ in range(16)]
+    cases = {
+        "valid_4byte": uid_frame(uid4[0]),
+        "valid_7byte": uid_frame(uid7[0]),
+        "valid_raw_payload": b'\xAA\x04' + uid4[1] + b'\x00\xBB',
+        "valid_burst_mixed": b"".join(uid_frame(u) for u in uid4[:24] + uid7[:8]),
+        "host_format_frame": encode_frame(CMD_UART_MODE) + b'\x00',
+        "empty_payload": b'\xAA\x00\x00\xBB' + uid_frame(uid4[2]),
+        "max_length_frame": b'\xAA\xFF' + rng.randbytes(255) + b'\x00\xBB' + uid_frame(uid4[3]),
+        "leading_garbage": noise(rng, 40) + uid_frame(uid4[4]),
+        "interleaved_noise": b"".join(noise(rng, rng.randint(1, 30)) + uid_frame(u) for u in uid4[5:15]),
+        "bad_tail_then_valid": uid_frame(uid4[15])[:-1] + b'\xCC' + uid_frame(uid4[16]),
+        "fake_header_in_noise": b'\x01\xAA\x30\x02' + noise(rng, 8) + uid_frame(uid4[17]),
+        "header_only": b'\xAA',
+        "truncated_frame": uid_frame(uid4[18])[:7],
+        "truncated_then_valid": uid_frame(uid4[19])[:6] + uid_frame(uid4[20]),
+        "all_noise": noise(rng, 512),
+    }
+    clean = b"".join(uid_frame(u) for u in uid4[21:40] + uid7[8:16])
+    for i in range(24):
+        cases[f"fuzz_{i:02d}"] = mutate(rng, clean)
+    corpus = []
+    for name, stream in cases.items():
+        frames, uids = decode(stream)
+        corpus.append({"name": name, "stream": stream.hex(), "frames": frames, "uids": uids})
+    return corpus
+
+
+def decode(stream, chunks=None):
+    dec = Decoder()
+    frames, uids = 0, []
+    pieces = [stream] if chunks is None else chunks
+    for piece in pieces:
+        for frame in dec.feed(piece):
+            frames += 1
+            found = extract_uid(frame.payload, raw=True)  # the corpus streams are all UID replies
+            if found:
+                uids.append(uid_to_str(found[0]))
+    return frames, uids
+
+
+def split(rng, stream):
+    cuts = sorted(rng.sample(range(1, len(stream)), min(len(stream) - 1, rng.randint(1, 12)))) if len(stream) > 1 else []
+    return [stream[a:b] for a, b in zip([0] + cuts, cuts + [len(stream)])]
+
+
+def load():
+    with open(CORPUS_PATH) as f:
+        return json.load(f)
+
+
+def check(corpus):
+    """Every case must decode to the recorded frames/UIDs whole, byte-by-byte and in random chunks"""
+    rng = random.Random(SEED)
+    failures = 0
+    for case in corpus:
+        stream = bytes.fromhex(case["stream"])
+        expected = (case["frames"], case["uids"])
+        for label, chunks in (("whole", None),
+                              ("bytewise", [stream[i:i + 1] for i in range(len(stream))]),
+                              ("random", split(rng, stream))):
+            got = decode(stream, chunks)
+            if got != expected:
+                failures += 1
+                print(f"FAIL {case['name']} [{label}]: expected {expected}, got {got}")
+    print(f"{len(corpus)} corpus cases, {failures} failure(s)")
+    return failures
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="D4 codec corpus")
+    ap.add_argument("--write", action="store_true", help="regenerate the corpus file")
+    args = ap.parse_args(argv)
+    if args.write:
+        corpus = generate()
+        with open(CORPUS_PATH, "w") as f:
+            json.dump(corpus, f, indent=1)
+            f.write("\n")
+        print(f"Wrote {len(corpus)} cases → {CORPUS_PATH}")
+        return 0
+    return 1 if check(load()) else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,323 @@
+# classifier.py
+# Smart tag classifier — rules live in tag_rules.json and are compiled once at startup
+import argparse
+import bisect
+import csv
+import json
+import os
+import sys
+from collections import Counter, namedtuple
+from types import MappingProxyType
+from tag_store import get_store, save_unknown
+
+np = None  # NumPy is optional and only imported by the batch API (keeps scanner startup fast)
+_numpy_checked = False
+
+RULES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "tag_rules.json")
+
+Rule = namedtuple("Rule", "type subtype freq color")
+
+
+def _rule(spec):
+    return Rule(spec["type"], spec["subtype"], spec["freq"], spec["color"])
+
+
+class CompiledRules:
+    """Exact UIDs in a frozen dict, ranges flattened into a sorted disjoint interval table"""
+
+    def __init__(self, spec):
+        self.exact = MappingProxyType({uid: _rule(r) for uid, r in spec.get("exact", {}).items()})
+        self.default = _rule(spec["default"])
+        self.invalid = _rule(spec["invalid"])
+        ranges = [(r["range"][0], r["range"][1], _rule(r)) for r in spec.get("ranges", [])]
+        self.starts, self.ends, self.rules = self._flatten(ranges)
+
+    @staticmethod
+    def _flatten(ranges):
+        """Resolve overlaps up front: earlier ranges in the file win, like the old if/elif chain"""
+        cuts = sorted({lo for lo, _, _ in ranges} | {hi + 1 for _, hi, _ in ranges})
+        starts, ends, rules = [], [], []
+        for lo, nxt in zip(cuts, cuts[1:]):
+            owner = next((r for a, b, r in ranges if a <= lo <= b), None)
+            if owner is None:
+                continue
+            if rules and rules[-1] is owner and ends[-1] == lo - 1:
+                ends[-1] = nxt - 1  # same rule continues — merge the segments
+            else:
+                starts.append(lo)
+                ends.append(nxt - 1)
+                rules.append(owner)
+        return starts, ends, rules
+
+    def match(self, uid):
+        """Rule for a 10-digit UID string (no learned-DB lookup)"""
+        hit = self.exact.get(uid)
+        if hit is not None:
+            return hit
+        return self.match_int(int(uid))
+
+    def match_int(self, uid_int):
+        i = bisect.bisect_right(self.starts, uid_int) - 1
+        if i >= 0 and uid_int <= self.ends[i]:
+            return self.rules[i]
+        return self.default
+
+
+def load_rules(path=RULES_PATH):
+    with open(path, encoding="utf-8") as f:
+        return CompiledRules(json.load(f))
+
+
+RULES = load_rules()
+
+
+def reload_rules(path=RULES_PATH):
+    global RULES
+    RULES = load_rules(path)
+    return RULES
+
+
+def learned_color(tag_type):
+    return "#00ff88" if "MIFARE" in tag_type or "Desfire" in tag_type else "#ff6b35"
+
+
+def is_uid(uid):
+    """A 10-digit decimal UID string — ASCII digits only ("²" or "٣" pass isdigit() but are no UID)"""
+    return len(uid) == 10 and uid.isascii() and uid.isdigit()
+
+
+def classify_tag_smart(raw_uid: str):
+    uid = raw_uid.strip()
+    learned = get_store().get(uid)
+    if learned and learned.get("assigned_type", "Unknown") != "Unknown":
+        return {
+            "uid": uid,
+            "type": learned["assigned_type"],
+            "subtype": learned.get("assigned_subtype", "Unknown"),
+            "freq": learned.get("frequency", "Unknown"),
+            "color": learned_color(learned["assigned_type"])
+        }
+
+    if is_uid(uid):
+        rule = RULES.exact.get(uid)
+        if rule is None:
+            rule = RULES.match_int(int(uid))
+            save_unknown(uid, rule.freq, raw_uid)
+        return {"uid": uid, "type": rule.type, "subtype": rule.subtype, "freq": rule.freq, "color": rule.color}
+
+    save_unknown(uid, "Unknown", raw_uid)
+    rule = RULES.invalid
+    return {"uid": uid, "type": rule.type, "subtype": rule.subtype, "freq": rule.freq, "color": rule.color}
+
+
+# ==================== BATCH CLASSIFICATION ====================
+FIELDS = ("type", "subtype", "freq", "color")
+
+
+class LearnedIndex:
+    """Labelled tags from one DB snapshot, ready for batch joins"""
+
+    def __init__(self, db=None):
+        if db is None:
+            db = get_store().snapshot()
+        self.by_uid = {}
+        for uid, rec in db.items():
+            tag_type = rec.get("assigned_type", "Unknown")
+            if tag_type != "Unknown":
+                self.by_uid[uid] = Rule(tag_type, rec.get("assigned_subtype", "Unknown"),
+                                        rec.get("frequency", "Unknown"), learned_color(tag_type))
+        numeric = sorted((int(u), r) for u, r in self.by_uid.items() if is_uid(u))
+        self.keys = [k for k, _ in numeric]
+        self.rules = [r for _, r in numeric]
+
+
+class BatchResult:
+    """Columnar output of classify_many: one integer code per UID for each field.
+
+    `result.codes[field][i]` indexes into `result.labels[field]`.
+    """
+
+    def __init__(self, uids, rule_codes, table):
+        self.uids = uids
+        self.labels = {}
+        self.codes = {}
+        for i, field in enumerate(FIELDS):
+            names = {}
+            field_map = [names.setdefault(rule[i], len(names)) for rule in table]
+            self.labels[field] = list(names)
+            if np is not None:
+                self.codes[field] = np.asarray(field_map, dtype=np.int32)[rule_codes]
+            else:
+                self.codes[field] = [field_map[c] for c in rule_codes]
+
+    def __len__(self):
+        return len(self.uids)
+
+    def column(self, field):
+        """Decoded values of one field"""
+        labels = self.labels[field]
+        return [labels[c] for c in self.codes[field]]
+
+    def rows(self):
+        cols = [self.column(f) for f in FIELDS]
+        for uid, *values in zip(self.uids, *cols):
+            yield (uid, *values)
+
+
+def _load_numpy():
+    global np, _numpy_checked
+    if not _numpy_checked:
+        _numpy_checked = True
+        try:
+            import numpy
+            np = numpy
+        except ImportError:
+            pass
+
+
+DIGIT_WEIGHTS = [10 ** (9 - i) for i in range(10)]
+
+
+def _parse_uids(uids):
+    """(uid strings, valid mask, int64 values) for a batch, without a per-UID Python loop.
+
+    Strings are checked as a (n, 10) array of code points, so only ASCII 0-9 count
+    as digits, and the weighted digits give the integer value directly.
+    """
+    if isinstance(uids, np.ndarray) and uids.dtype.kind in "iu":
+        values = uids.astype(np.int64)  # uint64 beyond int64 wraps negative: invalid as well
+        valid = (values >= 0) & (values < 10 ** 10)
+        strings = np.char.zfill(uids.astype(str), 10)
+        return strings.tolist(), valid, np.where(valid, values, 0)
+    strings = np.char.strip(np.asarray(uids, dtype=str).reshape(-1))
+    valid = np.char.str_len(strings) == 10
+    values = np.zeros(len(strings), dtype=np.int64)
+    if valid.any():
+        points = strings[valid].astype("U10").view(np.uint32).reshape(-1, 10)
+        digits = (points >= 48) & (points <= 57)
+        ok = digits.all(axis=1)
+        valid[valid] = ok
+        values[valid] = (points[ok].astype(np.int64) - 48) @ np.asarray(DIGIT_WEIGHTS, dtype=np.int64)
+    return strings.tolist(), valid, values
+
+
+def classify_many(uids, learned=None):
+    """Classify a sequence / NumPy array of UIDs in one pass. Never writes to the tag DB."""
+    _load_numpy()
+    if not isinstance(uids, (list, tuple)) and not (np is not None and isinstance(uids, np.ndarray)):
+        uids = list(uids)  # iterators / generators: np.asarray would make them one 0-d object
+    if learned is None:
+        learned = LearnedIndex()
+    rules = RULES
+    # code table: range segments, default, invalid, exact matches, learned labels
+    exact_keys = sorted(int(u) for u in rules.exact)
+    exact_rules = [rules.exact[str(k).zfill(10)] for k in exact_keys]
+    default_code = len(rules.rules)
+    invalid_code = default_code + 1
+    exact_base = invalid_code + 1
+    learned_base = exact_base + len(exact_rules)
+    table = list(rules.rules) + [rules.default, rules.invalid] + exact_rules + list(learned.rules)
+
+    if len(uids) == 0:
+        return BatchResult([], np.zeros(0, dtype=np.int64) if np is not None else [], table)
+    odd = {}  # non-numeric UIDs the learned DB still knows about
+    if np is not None:
+        uids, valid, values = _parse_uids(uids)
+        codes = np.full(len(uids), default_code, dtype=np.int64)
+
+        if rules.starts:
+            seg = np.searchsorted(np.asarray(rules.starts, dtype=np.int64), values, side="right") - 1
+            safe = np.clip(seg, 0, None)
+            inside = (seg >= 0) & (values <= np.asarray(rules.ends, dtype=np.int64)[safe])
+            codes[inside] = seg[inside]
+        for keys, base in ((exact_keys, exact_base), (learned.keys, learned_base)):
+            if not keys:
+                continue
+            keys = np.asarray(keys, dtype=np.int64)
+            pos = np.clip(np.searchsorted(keys, values), 0, len(keys) - 1)
+            hit = valid & (keys[pos] == values)
+            codes[hit] = base + pos[hit]
+        codes[~valid] = invalid_code
+        for i in np.flatnonzero(~valid):
+            rule = learned.by_uid.get(uids[i])
+            if rule is not None:
+                odd[i] = rule
+    else:
+        uids = [str(u).strip() for u in uids]
+        valid = [is_uid(u) for u in uids]
+        exact_pos = {k: i for i, k in enumerate(exact_keys)}
+        learned_pos = {k: i for i, k in enumerate(learned.keys)}
+        codes = []
+        for i, (uid, ok) in enumerate(zip(uids, valid)):
+            if not ok:
+                codes.append(invalid_code)
+                if uid in learned.by_uid:
+                    odd[i] = learned.by_uid[uid]
+                continue
+            value = int(uid)
+            if value in learned_pos:
+                codes.append(learned_base + learned_pos[value])
+            elif value in exact_pos:
+                codes.append(exact_base + exact_pos[value])
+            else:
+                seg = bisect.bisect_right(rules.starts, value) - 1
+                codes.append(seg if seg >= 0 and value <= rules.ends[seg] else default_code)
+
+    for i, rule in odd.items():
+        codes[i] = len(table)
+        table.append(rule)
+    return BatchResult(uids, codes, table)
+
+
+# ==================== CLI ====================
+def _read_uids(f, column, skip_header, chunk):
+    reader = csv.reader(f)
+    if skip_header:
+        next(reader, None)
+    batch = []
+    for row in reader:
+        if len(row) > column:
+            batch.append(row[column])
+            if len(batch) >= chunk:
+                yield batch
+                batch = []
+    if batch:
+        yield batch
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Re-classify a CSV/text log of UIDs with the current rules")
+    ap.add_argument("input", help="CSV or one-UID-per-line file ('-' for stdin)")
+    ap.add_argument("-o", "--output", default="-", help="CSV output (default stdout)")
+    ap.add_argument("--column", type=int, default=0, help="UID column index (default 0)")
+    ap.add_argument("--skip-header", action="store_true")
+    ap.add_argument("--chunk", type=int, default=100000, help="UIDs per batch (bounds memory)")
+    ap.add_argument("--rules", default=RULES_PATH)
+    args = ap.parse_args(argv)
+
+    if args.rules != RULES_PATH:
+        reload_rules(args.rules)
+    learned = LearnedIndex()
+    src = sys.stdin if args.input == "-" else open(args.input, newline="", encoding="utf-8")
+    dst = sys.stdout if args.output == "-" else open(args.output, "w", newline="", encoding="utf-8")
+    totals = Counter()
+    try:
+        out = csv.writer(dst)
+        out.writerow(("uid",) + FIELDS)
+        for batch in _read_uids(src, args.column, args.skip_header, args.chunk):
+            result = classify_many(batch, learned)
+            out.writerows(result.rows())
+            labels = result.labels["type"]
+            totals.update(labels[c] for c in result.codes["type"])
+    finally:
+        if src is not sys.stdin:
+            src.close()
+        if dst is not sys.stdout:
+            dst.close()
+    for tag_type, n in totals.most_common():
+        print(f"{n:>10}  {tag_type}", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,169 +1,32 @@
 # cyber_ninja_rfid_d4_final_fixed.py
 # 100% WORKING — BEAUTIFUL CYBERPUNK D4 TOOL
 import sys
-import time
-import json
-import os
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QLabel, QPushButton, QVBoxLayout,
-    QHBoxLayout, QWidget, QListWidget, QListWidgetItem, QFrame, QGridLayout,
+    QHBoxLayout, QWidget, QFrame, QGridLayout,
     QMessageBox, QInputDialog, QGraphicsDropShadowEffect
 )
 from PyQt6.QtCore import Qt, QTimer, pyqtSignal, QObject
 from PyQt6.QtGui import QPalette, QColor, QFont
 import pyperclip
+from tag_store import get_store
+from classifier import classify_tag_smart
+from audio import get_beeper, scan_tone
+from history_model import ScanHistoryModel, HistorySearch, history_view, UID_ROLE
+from event_log import get_event_log
 
 # ==================== DATABASE ====================
-DB_PATH = "learned_tags.json"
-
-def load_db():
-    if not os.path.exists(DB_PATH):
-        with open(DB_PATH, "w") as f:
-            json.dump({}, f)
-        return {}
-    try:
-        with open(DB_PATH) as f:
-            return json.load(f)
-    except:
-        return {}
-
-def save_db(db):
-    with open(DB_PATH, "w") as f:
-        json.dump(db, f, indent=4)
-
-def save_unknown(uid, freq, raw):
-    db = load_db()
-    if uid not in db:
-        db[uid] = {
-            "raw": raw,
-            "frequency": freq,
-            "assigned_type": "Unknown",
-            "assigned_subtype": "Pending",
-            "notes": "Auto-saved from D4"
-        }
-        save_db(db)
-
 def label_tag(uid):
     tag_type, ok1 = QInputDialog.getText(None, "Label Tag", "Tag Type (e.g. MIFARE Classic):")
     if not ok1 or not tag_type.strip():
         return
     subtype, ok2 = QInputDialog.getText(None, "Label Tag", "Subtype (e.g. S50 1K):")
     notes, _ = QInputDialog.getText(None, "Label Tag", "Notes (optional):")
-    db = load_db()
-    db[uid]["assigned_type"] = tag_type.strip()
-    db[uid]["assigned_subtype"] = subtype.strip() or "Unknown"
-    db[uid]["notes"] = notes.strip()  # FIXED: was missing key name
-    save_db(db)
+    get_store().label(uid, tag_type.strip(), subtype.strip(), notes.strip())
     QMessageBox.information(None, "Success", f"Labeled as:\n{tag_type} • {subtype}")
 
-# ==================== CLASSIFIER ====================
-def classify_tag_smart(raw_uid: str):
-    uid = raw_uid.strip()
-    learned = load_db().get(uid)
-    if learned and learned.get("assigned_type", "Unknown") != "Unknown":
-        color = "#00ff88" if "MIFARE" in learned["assigned_type"] or "Desfire" in learned["assigned_type"] else "#ff6b35"
-        return {"uid": uid, "type": learned["assigned_type"], "subtype": learned["assigned_subtype"],
-                "freq": learned["frequency"], "color": color}
-
-    if uid.isdigit() and len(uid) == 10:
-        direct_matches = {
-            # LF Tags (125kHz)
-            "1164124127": ("T5577 Clone", "Keri Tag", "LF 125kHz", "#ff3366"),
-            "1315027968": ("ICopyX ID1", "LF Card", "LF 125kHz", "#ff6b35"),
-            "0084148994": ("EM410x", "Converted T5577", "LF 125kHz", "#ff8844"),
-            "0165462222": ("T5577 Encrypted", "ICopyX Cards", "LF 125kHz", "#ff4488"),
-            "1654622220": ("T5577 Encrypted", "ICopyX Cards", "LF 125kHz", "#ff4488"),
-            # HF Tags (13.56MHz) - MIFARE
-            "1046976037": ("MIFARE Classic 4K", "ICopyX M1-4B", "HF 13.56MHz", "#00d4ff"),
-            "0514439285": ("MIFARE Classic 1K", "Blue Tag", "HF 13.56MHz", "#00d4ff"),
-            "0378741187": ("MIFARE S70 4K", "Classic", "HF 13.56MHz", "#00d4ff"),
-            "2746930474": ("MIFARE Classic 1K", "Client Tag", "HF 13.56MHz", "#00ffff"),
-            "3145225728": ("MIFARE Classic 1K", "Standard", "HF 13.56MHz", "#00d4ff"),
-            "0043568323": ("MIFARE S50 1K", "Gen3 Blank", "HF 13.56MHz", "#00ffff"),
-            # ICopyX M1-4B Cards (MIFARE 4K in special ranges)
-            "2403636915": ("MIFARE Classic 4K", "ICopyX M1-4B L3", "HF 13.56MHz", "#00d4ff"),
-            "2403648347": ("MIFARE Classic 4K", "ICopyX M1-4B L3", "HF 13.56MHz", "#00d4ff"),
-            "2811368341": ("MIFARE Classic 4K", "ICopyX M1-4B L2", "HF 13.56MHz", "#00d4ff"),
-            "2814923157": ("MIFARE Classic 4K", "ICopyX M1-4B L2", "HF 13.56MHz", "#00d4ff"),
-            # HF Tags (13.56MHz) - DESFire
-            "2417522474": ("DESFire EV1/EV2", "Standard", "HF 13.56MHz", "#ff00ff"),
-            "2418023930": ("DESFire EV1/EV2", "Blank Card", "HF 13.56MHz", "#ff00ff"),
-        }
-        if uid in direct_matches:
-            t, s, f, c = direct_matches[uid]
-            return {"uid": uid, "type": t, "subtype": s, "freq": f, "color": c}
-
-        # Smart classification for unknown tags
-        uid_int = int(uid)
-        
-        # ICopyX M1-4B L3 range (MIFARE 4K pretending to be high UID)
-        if 2403000000 <= uid_int <= 2404999999:
-            freq = "HF 13.56MHz"
-            color = "#00d4ff"
-            tag_type = "MIFARE Classic 4K"
-            subtype = "ICopyX M1-4B (L3)"
-        # ICopyX M1-4B L2 range (MIFARE 4K in 2.8B range)
-        elif 2810000000 <= uid_int <= 2819999999:
-            freq = "HF 13.56MHz"
-            color = "#00d4ff"
-            tag_type = "MIFARE Classic 4K"
-            subtype = "ICopyX M1-4B (L2)"
-        # DESFire range (2.417B - 2.419B is typical DESFire)
-        elif 2417000000 <= uid_int <= 2419999999:
-            freq = "HF 13.56MHz"
-            color = "#ff00ff"
-            tag_type = "DESFire (Probable)"
-            subtype = "EV1/EV2/EV3"
-        # Broader DESFire range
-        elif 2415000000 <= uid_int <= 2425000000:
-            freq = "HF 13.56MHz"
-            color = "#ff00ff"
-            tag_type = "DESFire (Probable)"
-            subtype = "Unknown Model"
-        # High LF range (3B+ are often LF clones)
-        elif uid_int >= 3000000000:
-            freq = "LF 125kHz"
-            color = "#ffaa00"
-            tag_type = "LF Tag (Probable)"
-            subtype = "Clone/Generic"
-        # Low MIFARE range (under 200M is usually genuine MIFARE)
-        elif uid_int < 200000000:
-            freq = "HF 13.56MHz"
-            color = "#00aaff"
-            tag_type = "MIFARE (Probable)"
-            subtype = "Classic S50/S70"
-        # Mid-low MIFARE range (200M - 1.5B)
-        elif 200000000 <= uid_int < 1500000000:
-            freq = "HF 13.56MHz"
-            color = "#00aaff"
-            tag_type = "MIFARE (Probable)"
-            subtype = "Classic/Ultralight"
-        # Mid-range LF (1.5B - 2.4B, excluding ICopyX ranges)
-        elif 1500000000 <= uid_int < 2403000000:
-            freq = "LF 125kHz"
-            color = "#ffaa00"
-            tag_type = "LF Tag (Probable)"
-            subtype = "EM/T5577"
-        # Catch-all for weird ranges
-        else:
-            freq = "HF 13.56MHz"
-            color = "#ffff00"
-            tag_type = "Unknown HF"
-            subtype = "Unusual Range"
-        
-        save_unknown(uid, freq, raw_uid)
-        return {"uid": uid, "type": tag_type, "subtype": subtype, "freq": freq, "color": color}
-
-    save_unknown(uid, "Unknown", raw_uid)
-    return {"uid": uid, "type": "UNKNOWN", "subtype": "Invalid Format", "freq": "?", "color": "#ffff00"}
-
 # ==================== BEEP & KEY LISTENER ====================
-def play_beep():
-    try:
-        import winsound
-        winsound.Beep(2200, 90)
-    except:
-        print("\a", end="")
+WEDGE_TONES = {"scan": [(2200, 90)]}
 
 class KeyListener(QObject):
     new_uid = pyqtSignal(str)
@@ -204,9 +67,12 @@ class CyberNinjaRFID(QMainWindow):
         self.original_uid = None
         self.is_scanning = True
         self.sound_enabled = True
+        self.beeper = get_beeper(WEDGE_TONES)
+        self.event_log = get_event_log()
         self.key_listener = KeyListener()
         self.key_listener.new_uid.connect(self.process_uid)
         self.init_ui()
+        self.search.load()
 
     def glow(self, widget, color_hex):
         effect = QGraphicsDropShadowEffect()
@@ -322,12 +188,21 @@ class CyberNinjaRFID(QMainWindow):
         # History
         history_label = QLabel("<b>SCAN HISTORY — Double-click to label</b>")
         history_label.setStyleSheet("color:#00ffff;font-size:22px;")
-        main.addWidget(history_label)
+        history_bar = QHBoxLayout()
+        history_bar.addWidget(history_label)
+        history_bar.addStretch()
+        main.addLayout(history_bar)
         
-        self.history = QListWidget()
-        self.history.setStyleSheet("background:#000;border:3px solid #00ffff;border-radius:20px;color:white;font-size:18px;padding:10px;")
-        self.history.itemDoubleClicked.connect(self.on_history_doubleclick)
+        self.history_model = ScanHistoryModel(parent=self)
+        self.history = history_view(self.history_model, "background:#000;border:3px solid #00ffff;border-radius:20px;color:white;font-size:18px;padding:10px;")
+        self.history.doubleClicked.connect(self.on_history_doubleclick)
         main.addWidget(self.history, 1)
+        self.search = HistorySearch(self.event_log, self.history, self.history_model, lambda text: self.status.setText(text),
+                                    "background:#000;color:#00ffff;border:2px solid #00ffff;border-radius:10px;font-size:16px;padding:4px;", self)
+        # the wedge types scans as keystrokes: only take focus when clicked, and hand it back after a search
+        self.search.field.setFocusPolicy(Qt.FocusPolicy.ClickFocus)
+        self.search.field.returnPressed.connect(self.search.field.clearFocus)
+        history_bar.addWidget(self.search.field)
 
         # Status
         self.status = QLabel("D4 Mode Active — Ready for 10-digit scans")
@@ -348,13 +223,14 @@ class CyberNinjaRFID(QMainWindow):
 
     def process_uid(self, raw):
         info = classify_tag_smart(raw)
+        self.search.record(info["uid"], "keyboard", info["type"], info["color"])
         self.uid_label.setText(info["uid"])
         self.uid_label.setStyleSheet(f"color: {info['color']};")
         self.glow(self.uid_label, info["color"])
         self.type_label.setText(f"{info['type']} • {info['subtype']}")
         self.freq_label.setText(info["freq"])
         if self.sound_enabled:
-            play_beep()
+            self.beeper.play(scan_tone(info, self.original_uid))
 
         if self.original_uid == info["uid"]:
             self.clone_label.setText("✓ CLONE MATCH")
@@ -366,11 +242,7 @@ class CyberNinjaRFID(QMainWindow):
         else:
             self.clone_label.setText("")
 
-        item = QListWidgetItem(f"[{time.strftime('%H:%M:%S')}] {info['type']} | {info['uid']}")
-        item.setForeground(QColor(info["color"]))
-        self.history.insertItem(0, item)
-        if self.history.count() > 40:
-            self.history.takeItem(self.history.count() - 1)
+        self.history_model.add(info["uid"], info["type"], info["color"])
 
     def copy_all(self):
         text = f"{self.uid_label.text()}\n{self.type_label.text()} {self.freq_label.text()}"
@@ -385,8 +257,8 @@ class CyberNinjaRFID(QMainWindow):
         else:
             QMessageBox.warning(self, "No Tag", "Scan a valid tag first!")
 
-    def on_history_doubleclick(self, item):
-        uid = item.text().split(" | ")[-1].strip()
+    def on_history_doubleclick(self, index):
+        uid = index.data(UID_ROLE) or ""
         if len(uid) == 10:
             label_tag(uid)
 
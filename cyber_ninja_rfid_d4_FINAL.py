@@ -2,362 +2,227 @@
 # THE ULTIMATE D4 TOOL - WITH EXTENSIVE DEBUG LOGGING
 import sys
 import time
-import json
-import os
-import serial
-import serial.tools.list_ports
+from functools import partial
 from PyQt6.QtWidgets import (
     QApplication, QMainWindow, QLabel, QPushButton, QVBoxLayout,
-    QHBoxLayout, QWidget, QListWidget, QListWidgetItem, QFrame, QGridLayout,
-    QMessageBox, QInputDialog, QGraphicsDropShadowEffect, QTextEdit
+    QHBoxLayout, QWidget, QFrame, QGridLayout,
+    QMessageBox, QInputDialog, QGraphicsDropShadowEffect, QPlainTextEdit, QComboBox
 )
-from PyQt6.QtCore import Qt, QTimer, pyqtSignal, QThread
+from PyQt6.QtCore import Qt, QTimer, pyqtSignal, QThread, QObject
 from PyQt6.QtGui import QPalette, QColor, QFont
 import pyperclip
+from tag_store import get_store
+from classifier import classify_tag_smart
+from d4_codec import auth_command, CMD_AUTH_A, CMD_AUTH_B, CMD_UART_MODE
+from d4_reader import D4Reader, list_d4_ports
+from d4_log import LEVELS, get_ring, set_level
+from presence import PresenceTracker, ARRIVED
+from audio import get_beeper, scan_tone
+from history_model import ScanHistoryModel, HistorySearch, history_view, UID_ROLE
+from event_log import get_event_log
+
+DEBUG_PULL_MS = 50        # the console pulls new log records from the ring buffer at this rate
+DEBUG_CONSOLE_LINES = 2000  # oldest lines are dropped past this
+PRESENCE_CHECK_MS = 250   # how often tags that left the field are expired
 
 # ==================== FULL BINARY UART THREAD ====================
 class D4UartThread(QThread):
+    """Runs a D4Reader on its own thread and re-emits its callbacks as Qt signals"""
     uid_detected = pyqtSignal(str)
     raw_uid_bytes = pyqtSignal(bytes)
     log = pyqtSignal(str)
-    debug = pyqtSignal(str)  # NEW: Detailed debug output
+    connection = pyqtSignal(bool)
 
-    def __init__(self):
+    def __init__(self, port=None, reader_id="D4", read_mode=None):
         super().__init__()
-        self.running = True
-        self.ser = None
-        self.buffer = bytearray()
-
-    def find_d4(self):
-        """Find D4 device - with detailed port scanning"""
-        self.debug.emit("=== SCANNING COM PORTS ===")
-        ports = list(serial.tools.list_ports.comports())
-        
-        if not ports:
-            self.debug.emit("❌ NO COM PORTS FOUND!")
-            return None
-            
-        for p in ports:
-            self.debug.emit(f"Found: {p.device} | {p.description} | VID:PID={p.vid}:{p.pid}")
-            # Expanded search terms
-            if any(k in p.description.upper() for k in ["CH340", "CH341", "CP210", "CP2102", "USB-SERIAL", "USB SERIAL", "USB-SER", "D4", "USB HID", "UART", "TTL"]):
-                self.debug.emit(f"✅ MATCHED: {p.device}")
-                return p.device
-        
-        # If no match, try the first available port
-        if ports:
-            self.debug.emit(f"⚠️ No match found, trying first port: {ports[0].device}")
-            return ports[0].device
-            
-        return None
-
-    def open_serial(self):
-        port = self.find_d4()
-        if not port:
-            self.debug.emit("❌ NO SERIAL PORT DETECTED")
-            return False
-        try:
-            self.ser = serial.Serial(port, 115200, timeout=0.1)
-            time.sleep(2.3)
-            self.log.emit(f"✅ D4 Connected → {port}")
-            self.debug.emit(f"Serial opened: {port} @ 115200 baud")
-            return True
-        except Exception as e:
-            self.log.emit(f"❌ Connection Error: {e}")
-            self.debug.emit(f"Failed to open {port}: {e}")
-            return False
+        self.reader_id = reader_id
+        self.reader = D4Reader(port, reader_id, read_mode,
+                               on_uid=self._on_uid, on_log=self.log.emit,
+                               on_connection=self.connection.emit)
+
+    def _on_uid(self, uid_str, uid_bytes, kind):
+        self.uid_detected.emit(uid_str)
+        self.raw_uid_bytes.emit(uid_bytes)
+
+    @property
+    def stats(self):
+        return self.reader.stats
 
+    # transmits from the GUI go through the reader's command queue and return Futures
     def switch_to_uart_mode(self):
-        """Force D4 into UART mode"""
-        pkt = b'\xAA\x02\x10\x01\xBB'
-        try:
-            if self.ser and self.ser.is_open:
-                self.ser.write(pkt)
-                self.log.emit("📡 FORCED → UART MODE")
-                self.debug.emit(f"Sent UART mode command: {pkt.hex().upper()}")
-                time.sleep(0.3)
-                self.ser.reset_input_buffer()
-                # Try to request a card immediately after
-                self.debug.emit("Sending initial REQA...")
-                self.send_frame(b'\x20')
-        except Exception as e:
-            self.log.emit("❌ UART switch failed")
-            self.debug.emit(f"UART switch error: {e}")
+        return self.reader.submit(CMD_UART_MODE, retries=0)
 
     def send_frame(self, cmd: bytes):
-        if not self.ser or not self.ser.is_open:
-            self.debug.emit("❌ Cannot send - serial not open")
-            return False
-        frame = b'\xAA' + len(cmd).to_bytes(1, 'big') + cmd + b'\xBB'
-        try:
-            self.ser.write(frame)
-            self.debug.emit(f"TX → {frame.hex().upper()}")
-            return True
-        except Exception as e:
-            self.debug.emit(f"Send error: {e}")
-            return False
+        return self.reader.submit(cmd)
 
     def request_select_sequence(self):
-        """Rock-solid REQA → Anticollision → Select"""
-        self.debug.emit("🔄 Starting REQA sequence...")
-        self.send_frame(b'\x20')   # REQA / WUPA
-        time.sleep(0.06)
-        self.send_frame(b'\x01')   # Anticollision CL1
-        time.sleep(0.06)
-        self.send_frame(b'\x21')   # Select CL1
-        time.sleep(0.06)
+        return self.reader.request_select_sequence()
 
     def parse_frame(self, data: bytes):
-        """Parse incoming UART frames"""
-        self.buffer.extend(data)
-        self.debug.emit(f"RX → Buffer: {self.buffer.hex().upper()} (len={len(self.buffer)})")
-        
-        while len(self.buffer) >= 5:
-            if self.buffer[0] != 0xAA:
-                self.debug.emit(f"❌ Bad header byte: {self.buffer[0]:02X}, skipping")
-                self.buffer = self.buffer[1:]
-                continue
-                
-            length = self.buffer[1]
-            expected_len = 4 + length
-            
-            if len(self.buffer) < expected_len:
-                self.debug.emit(f"⏳ Incomplete frame: have {len(self.buffer)}, need {expected_len}")
-                break
-                
-            frame = self.buffer[:expected_len]
-            
-            if frame[-1] != 0xBB:
-                self.debug.emit(f"❌ Bad tail byte: {frame[-1]:02X}, skipping")
-                self.buffer = self.buffer[1:]
-                continue
-
-            payload = frame[2:2+length]
-            self.debug.emit(f"✅ Valid frame: {frame.hex().upper()} | Payload: {payload.hex().upper()}")
-            
-            # Look for UID response patterns
-            if len(payload) >= 6:
-                self.debug.emit(f"Payload analysis: [0]={payload[0]:02X} [1]={payload[1]:02X}")
-                
-                # Pattern 1: 0x10 0x04 XX XX XX XX CS (4-byte UID)
-                if payload[0] == 0x10 and payload[1] == 0x04:
-                    uid_bytes = payload[2:6]
-                    uid_int = int.from_bytes(uid_bytes, 'big')
-                    uid_str = str(uid_int).zfill(10)
-                    self.uid_detected.emit(uid_str)
-                    self.raw_uid_bytes.emit(uid_bytes)
-                    self.log.emit(f"🎯 UID DETECTED → {uid_str}")
-                    self.debug.emit(f"4-byte UID: {uid_bytes.hex().upper()} = {uid_str}")
-                
-                # Pattern 2: 0x10 0x07 XX XX XX XX XX XX XX CS (7-byte UID)
-                elif payload[0] == 0x10 and payload[1] == 0x07 and len(payload) >= 9:
-                    uid_bytes = payload[2:9]
-                    uid_int = int.from_bytes(uid_bytes, 'big')
-                    uid_str = str(uid_int).zfill(10)
-                    self.uid_detected.emit(uid_str)
-                    self.raw_uid_bytes.emit(uid_bytes)
-                    self.log.emit(f"🎯 UID DETECTED (7-byte) → {uid_str}")
-                    self.debug.emit(f"7-byte UID: {uid_bytes.hex().upper()} = {uid_str}")
-                
-                # Pattern 3: Direct UID in payload (some firmware sends this)
-                elif len(payload) == 4:
-                    uid_bytes = payload
-                    uid_int = int.from_bytes(uid_bytes, 'big')
-                    uid_str = str(uid_int).zfill(10)
-                    self.uid_detected.emit(uid_str)
-                    self.raw_uid_bytes.emit(uid_bytes)
-                    self.log.emit(f"🎯 UID DETECTED (raw) → {uid_str}")
-                    self.debug.emit(f"Raw 4-byte UID: {uid_bytes.hex().upper()} = {uid_str}")
-
-            self.buffer = self.buffer[expected_len:]
+        self.reader.parse_frame(data)
 
     def run(self):
-        """Main thread loop - FIXED VERSION"""
-        scan_counter = 0
-        uart_mode_sent = False
-        self.debug.emit("🚀 D4 Thread started")
-        
-        while self.running:
-            if not self.ser or not self.ser.is_open:
-                if self.open_serial():
-                    # CRITICAL FIX: Give D4 time to fully boot before switching modes
-                    self.log.emit(f"✅ D4 Connected → {self.ser.port}")
-                    self.debug.emit("⏳ Waiting 800ms for D4 to stabilize...")
-                    time.sleep(0.8)  # Let D4 fully boot
-                    self.switch_to_uart_mode()
-                    uart_mode_sent = True
-                    scan_counter = 0  # Reset counter
-                else:
-                    self.debug.emit("⏳ Waiting 2s before retry...")
-                    time.sleep(2)
-                    continue
-
-            try:
-                # Continuous scanning - send REQA every 500ms
-                scan_counter += 1
-                if scan_counter % 50 == 0:  # Every 500ms (50 * 10ms)
-                    self.send_frame(b'\x20')  # REQA
-                    
-                # Check for incoming data
-                if self.ser.in_waiting:
-                    raw_data = self.ser.read(self.ser.in_waiting)
-                    self.debug.emit(f"📥 Received {len(raw_data)} bytes")
-                    self.parse_frame(raw_data)
-            except Exception as e:
-                self.ser = None
-                uart_mode_sent = False
-                self.log.emit("❌ D4 Disconnected")
-                self.debug.emit(f"Connection lost: {e}")
-                
-            time.sleep(0.01)
+        self.reader.run()
 
     def stop(self):
-        self.running = False
-        if self.ser and self.ser.is_open:
-            self.ser.close()
-            self.debug.emit("🛑 Serial port closed")
-
-# ==================== DATABASE & CLASSIFIER ====================
-DB_PATH = "learned_tags.json"
-
-def load_db():
-    if not os.path.exists(DB_PATH):
-        with open(DB_PATH, "w") as f:
-            json.dump({}, f)
-        return {}
-    try:
-        with open(DB_PATH) as f:
-            return json.load(f)
-    except:
-        return {}
-
-def save_db(db):
-    with open(DB_PATH, "w") as f:
-        json.dump(db, f, indent=4)
-
-def save_unknown(uid, freq, raw):
-    db = load_db()
-    if uid not in db:
-        db[uid] = {
-            "raw": raw,
-            "frequency": freq,
-            "assigned_type": "Unknown",
-            "assigned_subtype": "Pending",
-            "notes": "Auto-saved from D4"
-        }
-        save_db(db)
+        self.reader.stop()
+
+# ==================== MULTI-READER MANAGER ====================
+class ReaderManager(QObject):
+    """One D4UartThread per attached reader; UIDs merged into one sequenced stream.
+
+    Repeated reads of a tag resting on a reader are folded by a PresenceTracker:
+    only arrivals become uid_event, and tag_departed fires once it is lifted.
+    Classification and the tag store are process-wide, so every reader shares
+    the same compiled rules and DB cache.
+    """
+    uid_event = pyqtSignal(int, str, str)   # seq, reader_id, uid
+    raw_uid = pyqtSignal(str, bytes)        # reader_id, uid bytes
+    log = pyqtSignal(str, str)              # reader_id, message
+    tag_departed = pyqtSignal(str, str, int)  # reader_id, uid, reads while present
+    changed = pyqtSignal()                  # per-reader stats updated
+
+    def __init__(self, ports=None):
+        super().__init__()
+        self.ports = ports
+        self.threads = {}
+        self.stats = {}
+        self.seq = 0
+        self.presence = PresenceTracker()
+        self.presence_timer = QTimer(self)
+        self.presence_timer.timeout.connect(self._expire)
+
+    def start(self):
+        ports = self.ports if self.ports is not None else list_d4_ports()
+        for port in ports or [None]:  # nothing matched: one auto-discovering reader, as before
+            reader_id = port or "D4"
+            t = D4UartThread(port=port, reader_id=reader_id)
+            t.uid_detected.connect(partial(self._on_uid, reader_id))
+            t.raw_uid_bytes.connect(partial(self.raw_uid.emit, reader_id))
+            t.log.connect(partial(self.log.emit, reader_id))
+            t.connection.connect(partial(self._on_connection, reader_id))
+            self.threads[reader_id] = t
+            self.stats[reader_id] = {"online": False, "scans": 0, "reads": 0, "last_uid": None, "last_seen": None}
+            t.start()
+        self.presence_timer.start(PRESENCE_CHECK_MS)
+        self.changed.emit()
 
+    def stop(self):
+        self.presence_timer.stop()
+        for t in self.threads.values():
+            t.stop()
+        for t in self.threads.values():
+            t.wait()
+
+    def reader(self, reader_id):
+        return self.threads.get(reader_id)
+
+    def _on_uid(self, reader_id, uid):
+        st = self.stats[reader_id]
+        st["reads"] += 1
+        st["last_seen"] = time.time()
+        event, tag, departed = self.presence.read(uid, reader_id)
+        if departed is not None:  # lifted and put back between two _expire() ticks
+            self.tag_departed.emit(departed.reader, departed.uid, departed.reads)
+        if event != ARRIVED:
+            return  # same tag still on the reader: no classify / DB / beep / history row
+        self.seq += 1
+        st["scans"] += 1
+        st["last_uid"] = uid
+        self.uid_event.emit(self.seq, reader_id, uid)
+        self.changed.emit()
+
+    def _expire(self):
+        gone = self.presence.expire()
+        for tag in gone:
+            self.tag_departed.emit(tag.reader, tag.uid, tag.reads)
+        if gone:
+            self.changed.emit()
+
+    def _on_connection(self, reader_id, online):
+        self.stats[reader_id]["online"] = online
+        self.changed.emit()
+
+    def summary(self):
+        parts = []
+        for reader_id, st in self.stats.items():
+            state = "🟢" if st["online"] else "🔴"
+            last = f" · last {st['last_uid']}" if st["last_uid"] else ""
+            here = len(self.presence.on_reader(reader_id))
+            present = f" · {here} on reader" if here else ""
+            reqa = self.threads[reader_id].reader.scheduler
+            rate = f" · REQA {1 / reqa.period:.0f}/s" + (f" ({reqa.missed} missed)" if reqa.missed else "")
+            parts.append(f"{state} {reader_id}: {st['scans']} scans{last}{present}{rate}")
+        return "   |   ".join(parts)
+
+# ==================== DATABASE ====================
 def label_tag(uid):
     tag_type, ok1 = QInputDialog.getText(None, "Label Tag", "Tag Type (e.g. MIFARE Classic):")
     if not ok1 or not tag_type.strip():
         return
     subtype, ok2 = QInputDialog.getText(None, "Label Tag", "Subtype (e.g. S50 1K):")
     notes, _ = QInputDialog.getText(None, "Label Tag", "Notes (optional):")
-    db = load_db()
-    if uid not in db:
-        db[uid] = {}
-    db[uid]["assigned_type"] = tag_type.strip()
-    db[uid]["assigned_subtype"] = subtype.strip() or "Unknown"
-    db[uid]["notes"] = notes.strip() if notes else ""
-    save_db(db)
+    get_store().label(uid, tag_type.strip(), subtype.strip(), notes.strip() if notes else "")
     QMessageBox.information(None, "Success", f"Labeled as:\n{tag_type} • {subtype}")
 
-def classify_tag_smart(raw_uid: str):
-    uid = raw_uid.strip()
-    learned = load_db().get(uid)
-    if learned and learned.get("assigned_type", "Unknown") != "Unknown":
-        color = "#00ff88" if "MIFARE" in learned["assigned_type"] or "Desfire" in learned["assigned_type"] else "#ff6b35"
-        return {
-            "uid": uid,
-            "type": learned["assigned_type"],
-            "subtype": learned["assigned_subtype"],
-            "freq": learned.get("frequency", "Unknown"),
-            "color": color
-        }
-
-    if uid.isdigit() and len(uid) == 10:
-        direct_matches = {
-            "1164124127": ("T5577 Clone", "Keri Tag", "LF 125kHz", "#ff3366"),
-            "1315027968": ("ICopyX ID1", "LF Card", "LF 125kHz", "#ff6b35"),
-            "0084148994": ("EM410x", "Converted T5577", "LF 125kHz", "#ff8844"),
-            "0165462222": ("T5577 Encrypted", "ICopyX", "LF 125kHz", "#ff4488"),
-            "1654622220": ("T5577 Encrypted", "ICopyX", "LF 125kHz", "#ff4488"),
-            "1046976037": ("MIFARE Classic 4K", "ICopyX M1-4B", "HF 13.56MHz", "#00d4ff"),
-            "0514439285": ("MIFARE Classic 1K", "Blue Tag", "HF 13.56MHz", "#00d4ff"),
-            "0378741187": ("MIFARE S70 4K", "Classic", "HF 13.56MHz", "#00d4ff"),
-            "2746930474": ("MIFARE Classic 1K", "Client Tag", "HF 13.56MHz", "#00ffff"),
-            "3145225728": ("MIFARE Classic 1K", "Standard", "HF 13.56MHz", "#00d4ff"),
-            "0043568323": ("MIFARE S50 1K", "Gen3 Blank", "HF 13.56MHz", "#00ffff"),
-            "2403636915": ("MIFARE Classic 4K", "ICopyX M1-4B L3", "HF 13.56MHz", "#00d4ff"),
-            "2403648347": ("MIFARE Classic 4K", "ICopyX M1-4B L3", "HF 13.56MHz", "#00d4ff"),
-            "2811368341": ("MIFARE Classic 4K", "ICopyX M1-4B L2", "HF 13.56MHz", "#00d4ff"),
-            "2814923157": ("MIFARE Classic 4K", "ICopyX M1-4B L2", "HF 13.56MHz", "#00d4ff"),
-            "2417522474": ("DESFire EV1/EV2", "Standard", "HF 13.56MHz", "#ff00ff"),
-            "2418023930": ("DESFire EV1/EV2", "Blank", "HF 13.56MHz", "#ff00ff"),
-        }
-        if uid in direct_matches:
-            t, s, f, c = direct_matches[uid]
-            return {"uid": uid, "type": t, "subtype": s, "freq": f, "color": c}
-
-        uid_int = int(uid)
-        if 2403000000 <= uid_int <= 2404999999:
-            freq, color, tag_type, subtype = "HF 13.56MHz", "#00d4ff", "MIFARE Classic 4K", "ICopyX L3"
-        elif 2810000000 <= uid_int <= 2819999999:
-            freq, color, tag_type, subtype = "HF 13.56MHz", "#00d4ff", "MIFARE Classic 4K", "ICopyX L2"
-        elif 2415000000 <= uid_int <= 2425000000:
-            freq, color, tag_type, subtype = "HF 13.56MHz", "#ff00ff", "DESFire (Probable)", "EV1/EV2"
-        elif uid_int >= 3000000000:
-            freq, color, tag_type, subtype = "LF 125kHz", "#ffaa00", "LF Clone", "T5577/EM"
-        elif uid_int < 200000000:
-            freq, color, tag_type, subtype = "HF 13.56MHz", "#00aaff", "MIFARE Classic", "S50/S70"
-        else:
-            freq, color, tag_type, subtype = "HF 13.56MHz", "#ffff00", "Unknown HF", "Check Range"
-
-        save_unknown(uid, freq, raw_uid)
-        return {"uid": uid, "type": tag_type, "subtype": subtype, "freq": freq, "color": color}
-
-    save_unknown(uid, "Unknown", raw_uid)
-    return {"uid": uid, "type": "UNKNOWN", "subtype": "Invalid", "freq": "?", "color": "#ffff00"}
-
-def play_beep():
-    try:
-        import winsound
-        winsound.Beep(3000, 130)
-    except:
-        print("\a", end="")
-
 # ==================== MAIN WINDOW ====================
 class CyberNinjaRFID(QMainWindow):
+    auth_done = pyqtSignal(str, int, object, object)  # reader_id, block, select future, auth futures (from the reader thread)
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle("CYBER NINJA RFID — D4 ULTIMATE SNIFFER [DEBUG MODE]")
         self.resize(1600, 1100)
         self.original_uid = None
         self.current_uid_bytes = None
+        self.current_reader = None
         self.is_scanning = True
         self.sound_enabled = True
+        self.beeper = get_beeper()
+        self.event_log = get_event_log()
+        self.debug_ring = get_ring()
+        self.debug_seq = 0
 
         self.init_ui()
 
-        self.d4 = D4UartThread()
-        self.d4.uid_detected.connect(self.on_new_uid)
-        self.d4.raw_uid_bytes.connect(self.save_raw_uid)
-        self.d4.log.connect(self.on_log_message)
-        self.d4.debug.connect(self.on_debug_message)  # NEW
-        self.d4.start()
-
-    def on_log_message(self, message):
+        self.readers = ReaderManager()
+        self.readers.uid_event.connect(self.on_uid_event)
+        self.readers.raw_uid.connect(self.save_raw_uid)
+        self.readers.log.connect(self.on_log_message)
+        self.readers.tag_departed.connect(self.on_tag_departed)
+        self.readers.changed.connect(self.update_reader_panel)
+        self.auth_done.connect(self.on_auth_done)
+        self.search.load()
+        self.readers.start()
+        self.history_model.set_show_reader(len(self.readers.threads) > 1)
+        self.search.show_reader = self.history_model.show_reader
+
+        self.debug_timer = QTimer(self)
+        self.debug_timer.timeout.connect(self.pull_debug)
+        self.debug_timer.start(DEBUG_PULL_MS)
+
+    def on_log_message(self, reader_id, message):
         if hasattr(self, 'status'):
-            self.status.setText(message)
+            self.status.setText(f"[{reader_id}] {message}" if len(self.readers.threads) > 1 else message)
+
+    def on_tag_departed(self, reader_id, uid, reads):
+        self.on_log_message(reader_id, f"⏏ {uid} removed ({reads} reads)")
 
-    def on_debug_message(self, message):
-        """Display debug messages in the debug console"""
-        if hasattr(self, 'debug_console'):
-            self.debug_console.append(message)
-            # Auto-scroll to bottom
-            self.debug_console.verticalScrollBar().setValue(
-                self.debug_console.verticalScrollBar().maximum()
-            )
+    def update_reader_panel(self):
+        if hasattr(self, 'reader_panel'):
+            self.reader_panel.setText(self.readers.summary())
+
+    def pull_debug(self):
+        """Show log records emitted since the last pull (formatted only now, on the GUI thread)"""
+        self.debug_seq, lines = self.debug_ring.pull(self.debug_seq, DEBUG_CONSOLE_LINES)
+        if not lines:
+            return
+        bar = self.debug_console.verticalScrollBar()
+        at_bottom = bar.value() >= bar.maximum() - 2
+        self.debug_console.appendPlainText("\n".join(lines))  # one append per batch
+        # Auto-scroll only if the user hasn't scrolled up to read something
+        if at_bottom:
+            bar.setValue(bar.maximum())
 
     def glow(self, widget, color):
         effect = QGraphicsDropShadowEffect()
@@ -455,24 +320,46 @@ class CyberNinjaRFID(QMainWindow):
         main.addWidget(self.clone_label)
 
         # Debug Console - NEW!
+        debug_bar = QHBoxLayout()
         debug_label = QLabel("<b>🔍 DEBUG CONSOLE (Check for errors here!)</b>")
         debug_label.setStyleSheet("color:#ffff00;font-size:22px;")
-        main.addWidget(debug_label)
-
-        self.debug_console = QTextEdit()
+        debug_bar.addWidget(debug_label)
+        debug_bar.addStretch()
+        self.debug_level = QComboBox()
+        self.debug_level.addItems(list(LEVELS))
+        self.debug_level.setCurrentText("DEBUG")
+        self.debug_level.setStyleSheet("background:#000;color:#ffff00;font-size:16px;padding:4px;")
+        self.debug_level.currentTextChanged.connect(set_level)
+        debug_bar.addWidget(self.debug_level)
+        main.addLayout(debug_bar)
+
+        self.debug_console = QPlainTextEdit()
         self.debug_console.setReadOnly(True)
+        self.debug_console.setMaximumBlockCount(DEBUG_CONSOLE_LINES)
+        self.debug_console.setUndoRedoEnabled(False)
         self.debug_console.setStyleSheet("background:#000;border:4px solid #ffff00;border-radius:15px;color:#00ff00;font-family:Consolas;font-size:14px;padding:10px;")
         self.debug_console.setMaximumHeight(200)
         main.addWidget(self.debug_console)
 
+        history_bar = QHBoxLayout()
         history_label = QLabel("<b>SCAN HISTORY</b>")
         history_label.setStyleSheet("color:#00ffff;font-size:20px;")
-        main.addWidget(history_label)
+        history_bar.addWidget(history_label)
+        history_bar.addStretch()
+        main.addLayout(history_bar)
 
-        self.history = QListWidget()
-        self.history.setStyleSheet("background:#000;border:4px solid #00ffff;border-radius:20px;color:white;font-size:17px;padding:12px;")
-        self.history.itemDoubleClicked.connect(self.on_history_doubleclick)
+        self.history_model = ScanHistoryModel(parent=self)
+        self.history = history_view(self.history_model, "background:#000;border:4px solid #00ffff;border-radius:20px;color:white;font-size:17px;padding:12px;")
+        self.history.doubleClicked.connect(self.on_history_doubleclick)
         main.addWidget(self.history, 1)
+        self.search = HistorySearch(self.event_log, self.history, self.history_model, lambda text: self.status.setText(text),
+                                    "background:#000;color:#00ffff;border:2px solid #00ffff;border-radius:10px;font-size:16px;padding:4px;", self)
+        history_bar.addWidget(self.search.field)
+
+        self.reader_panel = QLabel("")
+        self.reader_panel.setStyleSheet("color:#00ffff;background:#000020;padding:10px;border-radius:12px;font-size:16px;")
+        self.reader_panel.setAlignment(Qt.AlignmentFlag.AlignCenter)
+        main.addWidget(self.reader_panel)
 
         self.status = QLabel("Starting up — Initializing D4 connection...")
         self.status.setStyleSheet("color:#00ff88;background:#000020;padding:18px;border-radius:15px;font-size:18px;")
@@ -480,24 +367,31 @@ class CyberNinjaRFID(QMainWindow):
         main.addWidget(self.status)
 
     def force_uart_mode(self):
-        if hasattr(self, 'd4'):
-            self.d4.switch_to_uart_mode()
+        if hasattr(self, 'readers'):
+            for d4 in self.readers.threads.values():
+                d4.switch_to_uart_mode()
+
+    def save_raw_uid(self, reader_id, uid_bytes: bytes):
+        if reader_id == self.current_reader:
+            self.current_uid_bytes = uid_bytes
 
-    def save_raw_uid(self, uid_bytes: bytes):
-        self.current_uid_bytes = uid_bytes
+    def on_uid_event(self, seq, reader_id, uid_str):
+        self.current_reader = reader_id
+        self.on_new_uid(uid_str, reader_id)
 
-    def on_new_uid(self, uid_str: str):
+    def on_new_uid(self, uid_str: str, reader_id=None):
         uid_int = int(uid_str)
-        self.current_uid_bytes = uid_int.to_bytes(4, 'big')
+        self.current_uid_bytes = uid_int.to_bytes(max(4, (uid_int.bit_length() + 7) // 8), 'big')  # 7-byte UIDs too
 
         info = classify_tag_smart(uid_str)
+        self.search.record(uid_str, reader_id, info["type"], info["color"])
         self.uid_label.setText(info["uid"])
         self.uid_label.setStyleSheet(f"color:{info['color']};")
         self.glow(self.uid_label, info["color"])
         self.type_label.setText(f"{info['type']} • {info['subtype']}")
         self.freq_label.setText(info["freq"])
         if self.sound_enabled:
-            play_beep()
+            self.beeper.play(scan_tone(info, self.original_uid))  # returns at once
 
         if self.original_uid == uid_str:
             self.clone_label.setText("✅ CLONE MATCH")
@@ -509,11 +403,7 @@ class CyberNinjaRFID(QMainWindow):
         else:
             self.clone_label.setText("")
 
-        item = QListWidgetItem(f"[{time.strftime('%H:%M:%S')}] {info['type']} | {info['uid']}")
-        item.setForeground(QColor(info["color"]))
-        self.history.insertItem(0, item)
-        if self.history.count() > 40:
-            self.history.takeItem(self.history.count() - 1)
+        self.history_model.add(info["uid"], info["type"], info["color"], reader_id)
 
     def trigger_auth(self):
         if not self.current_uid_bytes:
@@ -535,16 +425,45 @@ class CyberNinjaRFID(QMainWindow):
             QMessageBox.warning(self, "Invalid", "Key must be valid hex!")
             return
 
-        self.d4.request_select_sequence()
-        time.sleep(0.15)
+        d4 = self.readers.reader(self.current_reader)
+        if d4 is None:
+            QMessageBox.critical(self, "No Reader", "The reader that saw this card is gone!")
+            return
+
+        # every step is sent as soon as the card answers the previous one; nothing here blocks
+        reader_id = self.current_reader
+        sequence = d4.request_select_sequence()
+
+        def after_select(fut):
+            if fut.exception() is None and len(fut.result()) == 3:
+                auth = [d4.send_frame(auth_command(CMD_AUTH_A, block, key_bytes)),
+                        d4.send_frame(auth_command(CMD_AUTH_B, block, key_bytes))]
+                auth[-1].add_done_callback(lambda _: self.auth_done.emit(reader_id, block, fut, auth))
+            else:
+                self.auth_done.emit(reader_id, block, fut, [])
 
-        self.d4.send_frame(bytes([0x60, block]) + key_bytes)
-        time.sleep(0.12)
-        self.d4.send_frame(bytes([0x61, block]) + key_bytes)
+        sequence.add_done_callback(after_select)
+        self.status.setText(f"SELECTING → Block {block}...")
+
+    def on_auth_done(self, reader_id, block, sequence, auth):
+        if sequence.exception() is not None:
+            self.status.setText(f"❌ AUTH aborted: {sequence.exception()}")
+            return
+        if not auth:
+            stage = ("REQA", "ANTICOLLISION", "SELECT")[len(sequence.result())]
+            self.status.setText(f"⏱ No card answered {stage} — AUTH not sent")
+            return
 
-        self.status.setText(f"AUTH A+B SENT → Block {block}")
-        play_beep()
-        play_beep()
+        def state(fut):
+            if fut.exception() is not None:
+                return "❌"
+            return "✅" if fut.result() is not None else "⏱"
+        self.status.setText(f"AUTH A+B SENT → Block {block}   A {state(auth[0])} · B {state(auth[1])}")
+        self.beeper.play("auth")
+        d4 = self.readers.reader(reader_id)
+        if d4 is not None:
+            for stage, hist in list(d4.stats.latency.items()):
+                d4.reader.logger.info("⏱ %s %s", stage, hist)
 
     def copy_all(self):
         text = f"{self.uid_label.text()}\n{self.type_label.text()} {self.freq_label.text()}"
@@ -557,8 +476,8 @@ class CyberNinjaRFID(QMainWindow):
         if len(uid) == 10:
             label_tag(uid)
 
-    def on_history_doubleclick(self, item):
-        uid = item.text().split(" | ")[-1].strip()
+    def on_history_doubleclick(self, index):
+        uid = index.data(UID_ROLE) or ""
         if len(uid) == 10:
             label_tag(uid)
 
@@ -574,8 +493,7 @@ class CyberNinjaRFID(QMainWindow):
         self.status.setText("Original cleared")
 
     def closeEvent(self, event):
-        self.d4.stop()
-        self.d4.wait()
+        self.readers.stop()
         super().closeEvent(event)
 
 
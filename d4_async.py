@@ -0,0 +1,176 @@
+# d4_async.py
+# asyncio D4 transport — one event loop drives any number of readers via loop.add_reader (Linux/POSIX)
+#   python d4_async.py /dev/ttyUSB0 [/dev/ttyUSB1 ...]
+import argparse
+import asyncio
+import sys
+import serial
+from d4_codec import (
+    Decoder, answers, encode_frame, extract_uid, uid_to_str,
+    CMD_UART_MODE, CMD_REQA, CMD_ANTICOLL, CMD_SELECT, UID_COMMANDS
+)
+
+REPLY_TIMEOUT = 0.2   # seconds to wait for a response frame
+REQA_INTERVAL = 0.5
+UID_QUEUE_SIZE = 1024
+
+
+class AsyncD4Reader:
+    """Non-blocking D4 reader: frames are decoded as soon as the fd is readable.
+
+    Replies are matched to the waiting command by opcode (d4_codec.answers), so
+    send_frame() awaits its own reply instead of sleeping. Unsolicited UID frames
+    and replies that arrive after their command timed out match no waiter and
+    are dropped (counted in `unmatched`).
+    """
+
+    def __init__(self, port, baudrate=115200, name=None):
+        self.port = port
+        self.baudrate = baudrate
+        self.name = name or port
+        self.ser = None
+        self.decoder = Decoder()
+        self.loop = None
+        self.dropped = 0
+        self.unmatched = 0
+        self._uids = None
+        self._waiters = []  # (cmd, future), oldest first
+        self._tx_lock = None
+        self._poller = None
+
+    # ---------- lifecycle ----------
+    async def open(self, poll=True):
+        self.loop = asyncio.get_running_loop()
+        self._uids = asyncio.Queue(UID_QUEUE_SIZE)
+        self._tx_lock = asyncio.Lock()
+        self.ser = serial.Serial(self.port, self.baudrate, timeout=0, exclusive=True)
+        try:
+            self.loop.add_reader(self.ser.fileno(), self._on_readable)
+            await self.send_frame(CMD_UART_MODE)
+        except BaseException:
+            self.close()
+            raise
+        if poll:
+            self._poller = asyncio.create_task(self._poll_loop())
+        return self
+
+    def close(self):
+        if self._poller is not None:
+            self._poller.cancel()
+            self._poller = None
+        if self.ser is not None:
+            if self.loop is not None:
+                self.loop.remove_reader(self.ser.fileno())
+            self.ser.close()
+            self.ser = None
+        for _, fut in self._waiters:
+            if not fut.done():
+                fut.set_exception(ConnectionError(f"{self.name} closed"))
+        self._waiters.clear()
+
+    async def __aenter__(self):
+        return await self.open()
+
+    async def __aexit__(self, *exc):
+        self.close()
+
+    # ---------- RX ----------
+    def _on_readable(self):
+        try:
+            data = self.ser.read(self.ser.in_waiting or 1)
+        except (OSError, serial.SerialException) as e:
+            self.close()
+            self._put_uid(e)  # wakes uids() consumers so they can see the failure
+            return
+        for frame in self.decoder.feed(data):
+            waiter = next((w for w in self._waiters if answers(w[0], frame.payload)), None)
+            if waiter is not None:
+                self._waiters.remove(waiter)
+                if not waiter[1].done():
+                    waiter[1].set_result(frame)
+            else:
+                self.unmatched += 1
+            found = extract_uid(frame.payload, raw=waiter is not None and waiter[0][:1] in UID_COMMANDS)
+            if found:
+                self._put_uid(uid_to_str(found[0]))
+
+    def _put_uid(self, item):
+        if self._uids.full():
+            self._uids.get_nowait()  # drop the oldest rather than stall the reader
+            self.dropped += 1
+        self._uids.put_nowait(item)
+
+    async def uids(self):
+        """`async for uid in reader.uids()` — decimal UID strings as the GUI shows them"""
+        while True:
+            item = await self._uids.get()
+            if isinstance(item, Exception):
+                raise item
+            yield item
+
+    # ---------- TX ----------
+    async def send_frame(self, cmd: bytes, timeout=REPLY_TIMEOUT):
+        """Send one command and await its reply frame (None if the reader stays silent)"""
+        async with self._tx_lock:
+            if self.ser is None:
+                raise ConnectionError(f"{self.name} is not open")
+            waiter = (cmd, self.loop.create_future())
+            self._waiters.append(waiter)
+            try:
+                self.ser.write(encode_frame(cmd))
+                return await asyncio.wait_for(waiter[1], timeout)
+            except asyncio.TimeoutError:
+                return None  # a late reply now matches no waiter and is dropped
+            finally:
+                if waiter in self._waiters:
+                    self._waiters.remove(waiter)
+
+    async def request_select_sequence(self, timeout=REPLY_TIMEOUT):
+        """REQA → Anticollision → Select, each step as soon as the previous one answers"""
+        replies = []
+        for cmd in (CMD_REQA, CMD_ANTICOLL, CMD_SELECT):
+            reply = await self.send_frame(cmd, timeout)
+            replies.append(reply)
+            if reply is None:
+                break
+        return replies
+
+    async def _poll_loop(self):
+        try:
+            while True:
+                await self.send_frame(CMD_REQA)
+                await asyncio.sleep(REQA_INTERVAL)
+        except ConnectionError:
+            pass
+
+
+# ==================== CLI ====================
+async def _print_uids(reader):
+    async for uid in reader.uids():
+        print(f"{reader.name}\t{uid}", flush=True)
+
+
+async def run(ports):
+    readers = []
+    try:
+        for p in ports:
+            readers.append(await AsyncD4Reader(p).open())
+        await asyncio.gather(*(_print_uids(r) for r in readers))
+    finally:
+        for r in readers:
+            r.close()
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Print UIDs from one or more D4 readers (asyncio)")
+    ap.add_argument("ports", nargs="+")
+    args = ap.parse_args(argv)
+    try:
+        asyncio.run(run(args.ports))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
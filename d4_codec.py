@@ -0,0 +1,166 @@
+# d4_codec.py
+# D4 UART protocol codec — AA <len> <payload> .. BB framing, no Qt / serial dependency
+from collections import namedtuple
+from d4_log import TRACE
+
+HEADER = 0xAA
+TAIL = 0xBB
+MIN_FRAME = 5
+COMPACT_THRESHOLD = 4096  # consumed bytes before the decode buffer is shifted down
+
+# Commands (payload of an outgoing frame)
+CMD_UART_MODE = b'\x10\x01'
+CMD_REQA = b'\x20'          # REQA / WUPA
+CMD_ANTICOLL = b'\x01'      # Anticollision CL1
+CMD_SELECT = b'\x21'        # Select CL1
+CMD_AUTH_A = 0x60
+CMD_AUTH_B = 0x61
+UID_COMMANDS = (CMD_REQA, CMD_ANTICOLL)  # answered with a UID frame
+
+Frame = namedtuple("Frame", "payload raw")
+
+
+def encode_frame(cmd: bytes) -> bytes:
+    """AA <len> <cmd> BB"""
+    return b'\xAA' + len(cmd).to_bytes(1, 'big') + cmd + b'\xBB'
+
+
+def auth_command(key_type, block, key: bytes) -> bytes:
+    return bytes([key_type, block]) + key
+
+
+class Decoder:
+    """Incremental frame decoder: feed() raw serial bytes, get back complete frames.
+
+    Incoming frames are AA <len> <payload:len> <cs> BB (4 + len bytes). Garbage
+    is skipped by jumping to the next 0xAA; the buffer is a single bytearray
+    with a read offset, compacted only once the consumed prefix dominates.
+    Resync details are logged at TRACE level when a logger is given.
+
+    feed(data) returns Frames holding copies, safe to keep. feed(data, on_frame)
+    hands each Frame to on_frame as memoryview slices of the buffer instead —
+    zero-copy, which halves the per-frame cost, but the views are only valid
+    during the call (copy what you keep, and don't feed() from inside it).
+    """
+
+    def __init__(self, logger=None):
+        self.buffer = bytearray()
+        self.read_pos = 0  # start of unparsed data in self.buffer
+        self.logger = logger
+        self.frames = 0
+        self.bytes_in = 0
+        self.skipped = 0
+        self.bad_tails = 0
+
+    def pending(self):
+        """Bytes waiting for the rest of their frame"""
+        return len(self.buffer) - self.read_pos
+
+    def reset(self):
+        self.buffer.clear()
+        self.read_pos = 0
+
+    def feed(self, data, on_frame=None):
+        """Add bytes; returns the list of Frames they completed, or with `on_frame`
+        calls it per Frame (memoryview fields) and returns None"""
+        buf = self.buffer
+        buf.extend(data)
+        self.bytes_in += len(data)
+        pos = self.read_pos
+        end = len(buf)
+        trace = self.logger if self.logger is not None and self.logger.isEnabledFor(TRACE) else None
+        out = []
+        delivered = 0
+
+        with memoryview(buf) as view:
+            while end - pos >= MIN_FRAME:
+                if buf[pos] != HEADER:
+                    nxt = buf.find(HEADER, pos + 1)
+                    nxt = end if nxt < 0 else nxt
+                    if trace:
+                        trace.log(TRACE, "❌ Bad header byte: %02X, skipping %d byte(s)", buf[pos], nxt - pos)
+                    self.skipped += nxt - pos
+                    pos = nxt
+                    continue
+
+                length = buf[pos + 1]
+                expected_len = 4 + length
+
+                if end - pos < expected_len:
+                    if trace:
+                        trace.log(TRACE, "⏳ Incomplete frame: have %d, need %d", end - pos, expected_len)
+                    break
+
+                tail = buf[pos + expected_len - 1]
+                if tail != TAIL:
+                    if trace:
+                        trace.log(TRACE, "❌ Bad tail byte: %02X, skipping", tail)
+                    self.bad_tails += 1
+                    nxt = buf.find(HEADER, pos + 1)
+                    nxt = end if nxt < 0 else nxt
+                    self.skipped += nxt - pos
+                    pos = nxt
+                    continue
+
+                if on_frame is None:
+                    with view[pos:pos + expected_len] as raw:
+                        out.append(Frame(bytes(raw[2:2 + length]), bytes(raw)))
+                else:
+                    with view[pos:pos + expected_len] as raw, raw[2:2 + length] as payload:
+                        self.read_pos = pos + expected_len  # a raising callback doesn't see this frame again
+                        on_frame(Frame(payload, raw))
+                    delivered += 1
+                pos += expected_len
+
+        if pos >= end:
+            buf.clear()
+            pos = 0
+        elif pos > COMPACT_THRESHOLD and pos * 2 > end:
+            del buf[:pos]
+            pos = 0
+        self.read_pos = pos
+        self.frames += len(out) + delivered
+        return out if on_frame is None else None
+
+
+# ==================== UID EXTRACTION ====================
+def extract_uid(payload, raw=False):
+    """(uid_bytes, kind) for a UID response payload, else None. kind is "4-byte", "7-byte" or "raw".
+
+    A bare 4-byte payload is only taken as a UID with `raw` set, i.e. when a
+    REQA / anticollision reply is expected — otherwise every 4-byte ack or
+    status frame would be reported as a tag.
+    """
+    if len(payload) >= 6:
+        # Pattern 1: 0x10 0x04 XX XX XX XX CS (4-byte UID)
+        if payload[0] == 0x10 and payload[1] == 0x04:
+            return bytes(payload[2:6]), "4-byte"
+        # Pattern 2: 0x10 0x07 XX XX XX XX XX XX XX CS (7-byte UID)
+        if payload[0] == 0x10 and payload[1] == 0x07 and len(payload) >= 9:
+            return bytes(payload[2:9]), "7-byte"
+    # Pattern 3: Direct UID in payload (some firmware sends this)
+    elif raw and len(payload) == 4:
+        return bytes(payload), "raw"
+    return None
+
+
+def answers(cmd, payload):
+    """Whether `payload` is the reply to command `cmd`: REQA / anticollision are answered
+    with a UID, every other command by a frame starting with its opcode (not a UID frame)"""
+    if not cmd or not payload:
+        return False
+    if cmd[:1] in UID_COMMANDS:
+        return extract_uid(payload, raw=True) is not None
+    return payload[0] == cmd[0] and extract_uid(payload) is None
+
+
+def uid_to_str(uid_bytes):
+    """Decimal UID string as shown in the GUI (zero-padded to 10 digits)"""
+    return str(int.from_bytes(uid_bytes, 'big')).zfill(10)
+
+
+def uid_frame(uid_bytes, checksum=0):
+    """Device-side UID response frame (used by the corpus and simulators)"""
+    kind = 0x04 if len(uid_bytes) == 4 else 0x07
+    payload = bytes([0x10, kind]) + uid_bytes + bytes([checksum])
+    return b'\xAA' + bytes([len(payload)]) + payload + b'\x00\xBB'
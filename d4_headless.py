@@ -0,0 +1,224 @@
+# d4_headless.py
+# Headless D4 daemon — no Qt, streams scan events as newline-delimited JSON
+#   python d4_headless.py                          every D4 port → stdout
+#   python d4_headless.py --port /dev/ttyUSB0 --socket /run/d4.sock
+#   python d4_headless.py --file /var/log/d4/scans.jsonl
+#   arrivals are also appended to the binary event log (event_log.py) unless --no-event-log
+import argparse
+import json
+import logging
+import os
+import queue
+import signal
+import socket
+import sys
+import threading
+import time
+from classifier import classify_tag_smart
+from d4_log import TRACE, ReaderFormatter, log
+from d4_reader import D4Reader, ReqaScheduler, list_d4_ports, REQA_FAST, REQA_INTERVAL
+from presence import PresenceTracker, ARRIVED, PRESENT
+from event_log import EventLog, EVENT_LOG_DIR
+
+EXPIRE_INTERVAL = 0.25  # seconds between departure checks when no reads arrive
+CLIENT_BACKLOG = 1000   # event lines a socket client may fall behind before it is dropped
+
+
+# ==================== SINKS ====================
+class StreamSink:
+    def __init__(self, f):
+        self.f = f
+
+    def write(self, line):
+        self.f.write(line)
+        self.f.flush()
+
+    def close(self):
+        if self.f is not sys.stdout:
+            self.f.close()
+
+
+class SocketSink:
+    """Unix socket server: every connected client gets every event line.
+
+    write() never blocks on a client: each one has a bounded queue drained by
+    its own sender thread, and a client that falls CLIENT_BACKLOG lines behind
+    (stopped reading, suspended) is disconnected instead of stalling the readers.
+    """
+
+    def __init__(self, path, backlog=CLIENT_BACKLOG):
+        self.path = path
+        self.backlog = backlog
+        if os.path.exists(path):
+            os.remove(path)
+        self.server = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.server.bind(path)
+        self.server.listen()
+        self.clients = {}  # conn → its queue of pending lines
+        self.dropped = 0
+        self.lock = threading.Lock()
+        threading.Thread(target=self._accept, daemon=True).start()
+
+    def _accept(self):
+        while True:
+            try:
+                conn, _ = self.server.accept()
+            except OSError:
+                return
+            pending = queue.Queue(self.backlog)
+            with self.lock:
+                self.clients[conn] = pending
+            threading.Thread(target=self._send, args=(conn, pending), daemon=True).start()
+
+    def _send(self, conn, pending):
+        try:
+            while True:
+                data = pending.get()
+                if data is None:
+                    break
+                conn.sendall(data)
+        except OSError:
+            pass
+        self._drop(conn)
+        conn.close()
+
+    def _drop(self, conn):
+        with self.lock:
+            if self.clients.pop(conn, None) is None:
+                return
+        try:
+            conn.shutdown(socket.SHUT_RDWR)  # wakes a sender stuck in sendall
+        except OSError:
+            pass
+
+    def write(self, line):
+        data = line.encode()
+        with self.lock:
+            clients = list(self.clients.items())
+        for conn, pending in clients:
+            try:
+                pending.put_nowait(data)
+            except queue.Full:
+                log.warning("socket client %d lines behind — disconnected", self.backlog)
+                self.dropped += 1
+                self._drop(conn)
+
+    def close(self):
+        self.server.close()
+        with self.lock:
+            clients = list(self.clients.items())
+        for conn, pending in clients:
+            try:
+                pending.put_nowait(None)  # sender flushes what is queued, then closes
+            except queue.Full:
+                self._drop(conn)
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+# ==================== DAEMON ====================
+def event_json(event):
+    return json.dumps(event, separators=(",", ":"), ensure_ascii=False) + "\n"
+
+
+def run(ports, sink, verbose=0, reqa_fast=REQA_FAST, reqa_slow=REQA_INTERVAL, event_log=None):
+    events = queue.Queue()
+    readers = []
+    if verbose:
+        handler = logging.StreamHandler(sys.stderr)
+        handler.setFormatter(ReaderFormatter("[%(reader)s] %(levelname)s %(message)s"))
+        log.addHandler(handler)
+        log.setLevel(TRACE if verbose > 1 else logging.DEBUG)
+    else:
+        log.setLevel(logging.INFO)
+
+    for port in ports or [None]:
+        reader_id = port or "D4"
+
+        def on_uid(uid, uid_bytes, kind, reader_id=reader_id):
+            events.put({"event": "uid", "ts": time.time(), "reader": reader_id,
+                        "uid": uid, "raw": uid_bytes.hex().upper()})
+
+        def on_connection(online, reader_id=reader_id):
+            events.put({"event": "connected" if online else "disconnected",
+                        "ts": time.time(), "reader": reader_id})
+
+        reader = D4Reader(port, reader_id, on_uid=on_uid, on_connection=on_connection,
+                          scheduler=ReqaScheduler(reqa_fast, reqa_slow))
+        threading.Thread(target=reader.run, name=f"d4-{reader_id}", daemon=True).start()
+        readers.append(reader)
+
+    stopping = threading.Event()
+
+    def shutdown(*args):
+        stopping.set()
+        events.put(None)
+
+    signal.signal(signal.SIGTERM, shutdown)
+    signal.signal(signal.SIGINT, shutdown)
+
+    # classification runs here, on one thread, so every reader shares the rules and DB cache.
+    # Repeat reads of a resting tag are folded: "uid" on arrival, "present" heartbeats, "departed".
+    presence = PresenceTracker()
+    while not stopping.is_set():
+        try:
+            event = events.get(timeout=EXPIRE_INTERVAL)
+        except queue.Empty:
+            event = {}
+        if event is None:
+            break
+        if event.get("event") == "uid":
+            kind, tag, departed = presence.read(event["uid"], event["reader"])
+            if departed is not None:  # lifted and put back between two expire() passes
+                sink.write(event_json({"event": "departed", "ts": event["ts"], **departed.as_dict()}))
+            if kind == ARRIVED:
+                info = classify_tag_smart(event["uid"])
+                event.update(type=info["type"], subtype=info["subtype"], freq=info["freq"])
+                if event_log is not None:
+                    event_log.append(event["uid"], event["reader"], info["type"])
+                sink.write(event_json(event))
+            elif kind == PRESENT:
+                sink.write(event_json({"event": "present", "ts": event["ts"], **tag.as_dict()}))
+        elif event:
+            sink.write(event_json(event))
+        for tag in presence.expire():
+            sink.write(event_json({"event": "departed", "ts": time.time(), **tag.as_dict()}))
+
+    for reader in readers:
+        reader.stop()
+        if verbose:
+            print(f"[{reader.reader_id}] REQA {reader.scheduler.snapshot()}", file=sys.stderr)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Headless D4 reader: UID events as JSON lines")
+    ap.add_argument("--port", action="append", help="serial port (repeatable; default: every D4-looking port)")
+    out = ap.add_mutually_exclusive_group()
+    out.add_argument("--socket", help="serve events on this Unix socket path")
+    out.add_argument("--file", help="append events to this file")
+    ap.add_argument("-v", "--verbose", action="count", default=0,
+                    help="reader debug output on stderr (-vv adds per-frame TRACE output)")
+    ap.add_argument("--reqa-fast", type=float, default=REQA_FAST, help="REQA period (s) while a card answers")
+    ap.add_argument("--reqa-slow", type=float, default=REQA_INTERVAL, help="idle REQA period (s) to back off to")
+    ap.add_argument("--event-log", default=EVENT_LOG_DIR, help="binary event log directory (default %(default)s)")
+    ap.add_argument("--no-event-log", action="store_true")
+    args = ap.parse_args(argv)
+
+    if args.socket:
+        sink = SocketSink(args.socket)
+    elif args.file:
+        sink = StreamSink(open(args.file, "a", encoding="utf-8"))
+    else:
+        sink = StreamSink(sys.stdout)
+    event_log = None if args.no_event_log else EventLog(args.event_log)
+    try:
+        run(args.port if args.port else list_d4_ports(), sink, args.verbose, args.reqa_fast, args.reqa_slow, event_log)
+    finally:
+        sink.close()
+        if event_log is not None:
+            event_log.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,80 @@
+# d4_log.py
+# Leveled D4 logging — TRACE/DEBUG/INFO on the stdlib "d4" logger, kept in a bounded ring buffer
+import itertools
+import logging
+import threading
+from collections import deque
+
+TRACE = 5
+logging.addLevelName(TRACE, "TRACE")
+LEVELS = {"TRACE": TRACE, "DEBUG": logging.DEBUG, "INFO": logging.INFO}
+RING_CAPACITY = 5000
+
+log = logging.getLogger("d4")
+log.setLevel(logging.DEBUG)
+
+
+class Hex:
+    """Defers bytes.hex() until a record is actually formatted"""
+    __slots__ = ("data",)
+
+    def __init__(self, data):
+        self.data = data
+
+    def __str__(self):
+        return self.data.hex().upper()
+
+
+class ReaderFormatter(logging.Formatter):
+    """Adds %(reader)s — the logger name without the "d4." prefix"""
+
+    def formatMessage(self, record):
+        record.reader = record.name.partition(".")[2] or record.name
+        return super().formatMessage(record)
+
+
+class RingBufferHandler(logging.Handler):
+    """Keeps the newest records unformatted; readers pull what is new by sequence number"""
+
+    def __init__(self, capacity=RING_CAPACITY):
+        super().__init__()
+        self.records = deque(maxlen=capacity)
+        self.seq = 0
+        self.setFormatter(ReaderFormatter("%(asctime)s.%(msecs)03d %(levelname)-5s [%(reader)s] %(message)s", "%H:%M:%S"))
+
+    def emit(self, record):
+        self.seq += 1  # Handler.handle() holds self.lock around emit
+        self.records.append(record)
+
+    def pull(self, since, limit=None):
+        """(last_seq, formatted lines newer than `since`) — formatting happens here, not on the hot path.
+        With `limit`, only the newest `limit` lines are formatted."""
+        with self.lock:
+            seq = self.seq
+            n = min(seq - since, len(self.records), limit or len(self.records))
+            new = list(itertools.islice(reversed(self.records), n))
+        new.reverse()
+        return seq, [self.format(r) for r in new]
+
+
+_ring = None
+_ring_lock = threading.Lock()
+
+
+def get_ring():
+    """The process-wide ring buffer attached to the "d4" logger"""
+    global _ring
+    with _ring_lock:
+        if _ring is None:
+            _ring = RingBufferHandler()
+            log.addHandler(_ring)
+        return _ring
+
+
+def set_level(level):
+    """Runtime switch: "TRACE" / "DEBUG" / "INFO" (or a logging level number)"""
+    log.setLevel(LEVELS.get(level, level) if isinstance(level, str) else level)
+
+
+def reader_logger(reader_id):
+    return log.getChild(str(reader_id).replace(".", "_"))
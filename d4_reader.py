@@ -0,0 +1,808 @@
+# d4_reader.py
+# D4 serial read loop without any GUI dependency — shared by the Qt thread and the headless daemon
+import os
+import select
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor, as_completed
+import serial
+import serial.tools.list_ports
+from d4_log import TRACE, Hex, reader_logger
+from d4_codec import (
+    Decoder, Frame, answers, encode_frame, extract_uid, uid_to_str,
+    CMD_UART_MODE, CMD_REQA, CMD_ANTICOLL, CMD_SELECT, UID_COMMANDS
+)
+
+REQA_INTERVAL = 0.5   # idle REQA period (seconds)
+REQA_FAST = 0.08      # REQA period right after a card answered
+REQA_HOLD = 2.0       # stay fast this long after the last card reply
+REQA_BACKOFF = 1.5    # idle period growth per poll, up to REQA_INTERVAL
+POLL_INTERVAL = 0.01  # legacy "poll" read mode only
+REPLY_TIMEOUT = 0.2   # seconds to wait for a command's response frame
+RETRIES = 1           # resends after a reply timeout (queued commands)
+HANDSHAKE_INTERVAL = 0.25  # resend UART mode + REQA this often until the D4 answers
+BOOT_TIMEOUT = 3.1         # then assume it is up but quiet (the old fixed 2.3 s + 0.8 s boot wait)
+RETRY_MIN = 0.25           # reconnect backoff, doubled per failed attempt
+RETRY_MAX = 8.0
+PROBE_TIMEOUT = 1.0        # per-port deadline for a probe reply (all ports are probed in parallel)
+PROBE_NEGATIVE_TTL = 30.0  # don't re-probe a silent port for this long
+
+D4_PORT = os.environ.get("D4_PORT")  # path override, e.g. a d4_sim.py pty ("a,b" for several readers)
+D4_PORT_KEYWORDS = ["CH340", "CH341", "CP210", "CP2102", "USB-SERIAL", "USB SERIAL", "USB-SER", "D4", "USB HID", "UART", "TTL"]
+
+STAGES = {0x10: "uart_mode", 0x20: "reqa", 0x01: "anticoll", 0x21: "select", 0x60: "auth_a", 0x61: "auth_b"}
+SELECT_SEQUENCE = (CMD_REQA, CMD_ANTICOLL, CMD_SELECT)
+
+UID_LOG = {
+    "4-byte": "🎯 UID DETECTED → {}",
+    "7-byte": "🎯 UID DETECTED (7-byte) → {}",
+    "raw": "🎯 UID DETECTED (raw) → {}",
+}
+
+
+def stage_name(cmd):
+    return STAGES.get(cmd[0], f"0x{cmd[0]:02X}") if cmd else "?"
+
+
+class LatencyHistogram:
+    """Command → reply latencies in fixed millisecond buckets (constant memory)"""
+    EDGES_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+    def __init__(self):
+        self.counts = [0] * (len(self.EDGES_MS) + 1)
+        self.n = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def add(self, seconds):
+        ms = seconds * 1000
+        i = 0
+        while i < len(self.EDGES_MS) and ms > self.EDGES_MS[i]:
+            i += 1
+        self.counts[i] += 1
+        self.n += 1
+        self.total += ms
+        self.max = max(self.max, ms)
+
+    def percentile(self, p):
+        """Upper bucket edge (ms) below which `p` percent of samples fall"""
+        if not self.n:
+            return 0.0
+        need = self.n * p / 100
+        seen = 0
+        for edge, count in zip(self.EDGES_MS, self.counts):
+            seen += count
+            if seen >= need:
+                return min(float(edge), self.max)
+        return self.max
+
+    def summary(self):
+        labels = [f"<={e}" for e in self.EDGES_MS] + [f">{self.EDGES_MS[-1]}"]
+        return {
+            "n": self.n,
+            "avg_ms": self.total / self.n if self.n else 0.0,
+            "p50_ms": self.percentile(50),
+            "p95_ms": self.percentile(95),
+            "max_ms": self.max,
+            "buckets": {label: c for label, c in zip(labels, self.counts) if c},
+        }
+
+    def __str__(self):
+        return (f"n={self.n} avg={self.total / max(self.n, 1):.1f}ms p50<={self.percentile(50):.1f}ms "
+                f"p95<={self.percentile(95):.1f}ms max={self.max:.1f}ms")
+
+
+class ReadStats:
+    """Loop wakeups, thread CPU time and RX-to-emit latency of the serial thread"""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.cpu_start = time.thread_time()
+        self.wakeups = 0
+        self.bytes = 0
+        self.uids = 0
+        self.latency_total = 0.0
+        self.latency_max = 0.0
+        self.commands = 0
+        self.retries = 0
+        self.timeouts = 0
+        self.latency = {}  # stage name → LatencyHistogram
+        self.ready_s = None       # run() start → first successful handshake
+        self.first_scan_s = None  # run() start → first UID
+        self.reconnects = 0
+        self.reconnect_total = 0.0
+        self.reconnect_max = 0.0
+        self.silent_handshakes = 0
+
+    def add_reconnect(self, seconds):
+        self.reconnects += 1
+        self.reconnect_total += seconds
+        self.reconnect_max = max(self.reconnect_max, seconds)
+
+    def add_latency(self, stage, seconds):
+        hist = self.latency.get(stage)
+        if hist is None:
+            hist = self.latency[stage] = LatencyHistogram()
+        hist.add(seconds)
+
+    def add_uid(self, latency):
+        self.uids += 1
+        self.latency_total += latency
+        self.latency_max = max(self.latency_max, latency)
+
+    def snapshot(self):
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        cpu = time.thread_time() - self.cpu_start  # only meaningful when called from the reader thread
+        return {
+            "wakeups_per_s": self.wakeups / elapsed,
+            "bytes": self.bytes,
+            "uids": self.uids,
+            "rx_to_emit_ms_avg": self.latency_total / self.uids * 1000 if self.uids else 0.0,
+            "rx_to_emit_ms_max": self.latency_max * 1000,
+            "cpu_percent": cpu / elapsed * 100,
+            "commands": self.commands,
+            "retries": self.retries,
+            "timeouts": self.timeouts,
+            "latency": {stage: h.summary() for stage, h in self.latency.items()},
+            "startup_to_ready_s": self.ready_s,
+            "startup_to_first_scan_s": self.first_scan_s,
+            "reconnects": self.reconnects,
+            "reconnect_s_avg": self.reconnect_total / self.reconnects if self.reconnects else 0.0,
+            "reconnect_s_max": self.reconnect_max,
+            "silent_handshakes": self.silent_handshakes,
+        }
+
+
+class ReqaScheduler:
+    """Drift-free, adaptive REQA timing on the monotonic clock.
+
+    Deadlines advance by exactly one period from the previous deadline, not
+    from when the loop got round to it. The period drops to `fast` whenever a
+    card answers (activity) and grows by `backoff` per poll once nothing has
+    answered for `hold` seconds, up to `slow`. A deadline we are more than a
+    period late for is counted as missed and the schedule restarts from now.
+    """
+
+    def __init__(self, fast=REQA_FAST, slow=REQA_INTERVAL, hold=REQA_HOLD, backoff=REQA_BACKOFF):
+        self.fast = fast
+        self.slow = max(slow, fast)
+        self.hold = hold
+        self.backoff = backoff
+        self.period = self.slow
+        self.next_due = 0.0
+        self.last_activity = float("-inf")
+        self.started = time.monotonic()
+        self.polls = 0
+        self.skipped = 0  # slots given up to a queued command
+        self.missed = 0
+
+    def start(self, now):
+        self.next_due = now + self.period
+
+    def due(self, now):
+        return now >= self.next_due
+
+    def sent(self, now, skipped=False):
+        """Advance past the deadline that just fired"""
+        if skipped:
+            self.skipped += 1
+        else:
+            self.polls += 1
+        if now - self.last_activity > self.hold:
+            self.period = min(self.period * self.backoff, self.slow)
+        late = now - self.next_due
+        if late > self.period:
+            self.missed += int(late / self.period)
+            self.next_due = now + self.period
+        else:
+            self.next_due += self.period
+
+    def activity(self, now):
+        """A card answered — poll fast from here on"""
+        self.last_activity = now
+        if self.period > self.fast:
+            self.period = self.fast
+            self.next_due = min(self.next_due, now + self.fast)
+
+    def snapshot(self):
+        elapsed = max(time.monotonic() - self.started, 1e-9)
+        return {
+            "period_ms": self.period * 1000,
+            "polls_per_s": self.polls / elapsed,
+            "polls": self.polls,
+            "skipped": self.skipped,
+            "missed": self.missed,
+        }
+
+
+class Command:
+    """One queued transmit; `future` (if any) resolves to the reply Frame, or None on timeout"""
+    __slots__ = ("cmd", "timeout", "retries", "future", "deadline", "sent_at")
+
+    def __init__(self, cmd, timeout=REPLY_TIMEOUT, retries=RETRIES, future=None):
+        self.cmd = cmd
+        self.timeout = timeout
+        self.retries = retries
+        self.future = future
+        self.deadline = 0.0
+        self.sent_at = 0.0
+
+    def resolve(self, result=None, error=None):
+        fut = self.future
+        if fut is None or fut.done():
+            return
+        if error is not None:
+            fut.set_exception(error)
+        else:
+            fut.set_result(result)
+
+
+def _ignore(*args):
+    pass
+
+
+def is_d4_port(p):
+    return any(k in (p.description or "").upper() for k in D4_PORT_KEYWORDS)
+
+
+def list_d4_ports():
+    """Every attached serial port that looks like a D4 reader (or the D4_PORT override)"""
+    if D4_PORT:
+        return D4_PORT.split(",")
+    return [p.device for p in serial.tools.list_ports.comports() if is_d4_port(p)]
+
+
+def port_identity(device):
+    """(VID, PID, serial number) of a USB serial port; None for anything else, and for
+    adapters without a serial number (CH340s), since every one of those looks the same"""
+    for p in serial.tools.list_ports.comports():
+        if p.device == device:
+            return _identity(p)
+    return None
+
+
+def device_for(identity):
+    """Current device path of a USB adapter — survives COM / ttyUSB renumbering on replug"""
+    if identity is None:
+        return None
+    for p in serial.tools.list_ports.comports():
+        if _identity(p) == identity:
+            return p.device
+    return None
+
+
+# ==================== PORT PROBING ====================
+_probe_cache = {}  # device → (identity, answered, checked_at)
+_probe_lock = threading.Lock()
+
+
+def _identity(p):
+    return (p.vid, p.pid, p.serial_number) if p.vid is not None and p.serial_number else None
+
+
+def probe_port(device, timeout=PROBE_TIMEOUT, cancel=None):
+    """Open `device`, send UART mode + REQA and wait for one valid AA…BB frame"""
+    try:
+        ser = serial.Serial(device, 115200, timeout=0.05, exclusive=True)
+    except Exception:
+        return False
+    decoder = Decoder()
+    pkt = encode_frame(CMD_UART_MODE) + encode_frame(CMD_REQA)
+    deadline = time.monotonic() + timeout
+    resend = 0.0
+    try:
+        with ser:
+            while not (cancel is not None and cancel.is_set()):
+                now = time.monotonic()
+                if now >= deadline:
+                    break
+                if now >= resend:
+                    ser.write(pkt)
+                    resend = now + HANDSHAKE_INTERVAL
+                data = ser.read(ser.in_waiting or 1)
+                if data and decoder.feed(data):
+                    return True
+    except Exception:
+        pass
+    return False
+
+
+def probe_ports(devices, timeout=PROBE_TIMEOUT):
+    """Probe every device at once; returns the first one that answers (None if none do).
+
+    Total time is about one probe however many ports there are. Verdicts are
+    cached for find_d4(); probes cut short by the winner are not recorded.
+    """
+    if not devices:
+        return None
+    ids = {p.device: _identity(p) for p in serial.tools.list_ports.comports()}
+    found = threading.Event()
+    pool = ThreadPoolExecutor(max_workers=len(devices), thread_name_prefix="d4-probe")
+    jobs = {pool.submit(probe_port, d, timeout, found): d for d in devices}
+    winner = None
+    try:
+        for job in as_completed(jobs):
+            device = jobs[job]
+            answered = job.result()
+            with _probe_lock:
+                _probe_cache[device] = (ids.get(device), answered, time.monotonic())
+            if answered:
+                winner = device
+                found.set()
+                break
+    finally:
+        pool.shutdown(wait=False)
+    return winner
+
+
+def cached_d4(ports):
+    """A previously probed D4 that is still attached under the same USB identity"""
+    with _probe_lock:
+        for p in ports:
+            hit = _probe_cache.get(p.device)
+            if hit and hit[1] and hit[0] == _identity(p):
+                return p.device
+    return None
+
+
+def probe_candidates(ports):
+    """Ports worth probing: everything not recently found silent"""
+    now = time.monotonic()
+    out = []
+    with _probe_lock:
+        for p in ports:
+            hit = _probe_cache.get(p.device)
+            if hit and not hit[1] and now - hit[2] < PROBE_NEGATIVE_TTL:
+                continue
+            out.append(p.device)
+    return out
+
+
+class SelectSequence:
+    """REQA → Anticollision → Select as a state machine over the command queue.
+
+    Each stage is submitted when the previous one answers, so selection takes
+    as long as the card needs. A stage that stays silent (after its retries)
+    ends the sequence early. `future` resolves to the reply frames received,
+    i.e. a full list of three only when the card was selected.
+    """
+
+    def __init__(self, reader, timeout=REPLY_TIMEOUT, retries=RETRIES):
+        self.reader = reader
+        self.timeout = timeout
+        self.retries = retries
+        self.replies = []
+        self.future = Future()
+        self.started = time.monotonic()
+        self._submit()
+
+    def _submit(self):
+        cmd = SELECT_SEQUENCE[len(self.replies)]
+        self.reader.submit(cmd, self.timeout, self.retries).add_done_callback(self._on_reply)
+
+    def _on_reply(self, fut):
+        if fut.cancelled() or fut.exception() is not None:
+            if not self.future.done():
+                self.future.set_exception(fut.exception() or ConnectionError("select sequence cancelled"))
+            return
+        reply = fut.result()
+        if reply is not None:
+            self.replies.append(reply)
+            if len(self.replies) < len(SELECT_SEQUENCE):
+                self._submit()
+                return
+            self.reader.stats.add_latency("select_sequence", time.monotonic() - self.started)
+        self.reader.logger.debug("Select sequence: %d/%d stages answered in %.1f ms", len(self.replies),
+                                 len(SELECT_SEQUENCE), (time.monotonic() - self.started) * 1000)
+        self.future.set_result(self.replies)
+
+
+class D4Reader:
+    """Qt-free D4 serial session: connect, switch to UART mode, poll REQA, decode UIDs.
+
+    Events are reported through plain callbacks so the same loop can run under
+    a QThread (the GUI) or a bare thread (d4_headless.py):
+      on_uid(uid_str, uid_bytes, kind), on_log(msg), on_connection(online)
+    Debug output goes to the "d4.<reader_id>" logger (see d4_log.py).
+
+    Only the reader thread writes to the port. Other threads call submit(),
+    which queues the command and returns a Future; the D4 answers one command
+    at a time, so the reply (matched by opcode, see d4_codec.answers) resolves
+    the command in flight and the next queued one goes out immediately.
+    Commands submitted while disconnected fail with ConnectionError.
+    """
+
+    def __init__(self, port=None, reader_id="D4", read_mode=None,
+                 on_uid=None, on_log=None, on_connection=None, scheduler=None):
+        self.running = True
+        self._stopped = threading.Event()
+        self.ser = None
+        self.port = port  # None = scan for the first D4-looking port
+        self.reader_id = reader_id
+        self.on_uid = on_uid or _ignore
+        self.log = on_log or _ignore
+        self.log_uids = on_log is not None  # the per-UID UI line is only built for a real sink
+        self.connection = on_connection or _ignore
+        self.logger = reader_logger(reader_id)
+        self.decoder = Decoder(logger=self.logger)
+        # "select": wait on the fd (POSIX); "timeout": blocking read sized to the next REQA;
+        # "poll": the old 10 ms in_waiting loop, kept for A/B measurements
+        self.read_mode = read_mode or ("select" if os.name == "posix" else "timeout")
+        self.stats = ReadStats()
+        self.scheduler = scheduler or ReqaScheduler()
+        self.last_device = None  # last port that completed a handshake — tried first on reconnect
+        self.identity = None     # its (VID, PID, serial number), to find it again after a replug
+        self.rx_time = 0.0
+        self.commands = deque()
+        self.inflight = None
+        self._wake_r = self._wake_w = None  # self-pipe, only while run() is active
+        self._wake_lock = threading.Lock()
+
+    def find_d4(self, path=None):
+        """Find D4 device - path override, cached probe result, else probe every port at once, else match descriptions"""
+        path = path or (D4_PORT.split(",")[0] if D4_PORT else None)
+        if path:
+            return path
+        logger = self.logger
+        logger.debug("=== SCANNING COM PORTS ===")
+        ports = list(serial.tools.list_ports.comports())
+        
+        if not ports:
+            logger.info("❌ NO COM PORTS FOUND!")
+            return None
+
+        cached = cached_d4(ports)
+        if cached:
+            logger.debug("✅ CACHED: %s", cached)
+            return cached
+        started = time.monotonic()
+        answered = probe_ports(probe_candidates(ports))
+        if answered:
+            logger.info("✅ PROBED: %s answered (%.0f ms)", answered, (time.monotonic() - started) * 1000)
+            return answered
+        logger.debug("No port answered the probe, matching descriptions")
+            
+        for p in ports:
+            logger.debug("Found: %s | %s | VID:PID=%s:%s", p.device, p.description, p.vid, p.pid)
+            if is_d4_port(p):
+                logger.debug("✅ MATCHED: %s", p.device)
+                return p.device
+        
+        # If no match, try the first available port
+        if ports:
+            logger.info("⚠️ No match found, trying first port: %s", ports[0].device)
+            return ports[0].device
+            
+        return None
+
+    def _candidates(self, path=None):
+        """Override, then the configured port; an auto-discovering reader first tries its last
+        good device and wherever its USB identity moved to, then scans"""
+        seen = []
+        if path:
+            seen.append(path)
+            yield path
+        if self.port:  # fixed port: never wander onto another reader's adapter
+            if self.port not in seen:
+                yield self.port
+            return
+        if self.last_device:
+            seen.append(self.last_device)
+            yield self.last_device
+        moved = device_for(self.identity)
+        if moved and moved not in seen:
+            seen.append(moved)
+            yield moved
+        port = self.find_d4()
+        if port and port not in seen:
+            yield port
+
+    def open_serial(self, path=None):
+        error = None
+        for port in self._candidates(path):
+            try:
+                self.ser = serial.Serial(port, 115200, timeout=0.1, exclusive=True)  # POSIX: flock, no second reader
+                self.logger.info("Serial opened: %s @ 115200 baud", port)
+                return True
+            except Exception as e:
+                error = e
+                self.logger.info("Failed to open %s: %s", port, e)
+        if error is None:
+            self.logger.info("❌ NO SERIAL PORT DETECTED")
+        else:
+            self.log(f"❌ Connection Error: {error}")
+        return False
+
+    def switch_to_uart_mode(self):
+        """Force D4 into UART mode: resend UART mode + REQA until any frame comes back.
+
+        Returns True as soon as the D4 answers (no fixed boot sleeps); after
+        BOOT_TIMEOUT it gives up waiting and returns False, the reader is then
+        assumed to be up but quiet (some firmware only answers with a card).
+        """
+        pkt = encode_frame(CMD_UART_MODE) + encode_frame(CMD_REQA)
+        frames = self.decoder.frames
+        deadline = time.monotonic() + BOOT_TIMEOUT
+        while self.running:
+            self.ser.write(pkt)
+            self.logger.debug("Sent UART mode + REQA: %s", Hex(pkt))
+            resend = min(time.monotonic() + HANDSHAKE_INTERVAL, deadline)
+            while True:
+                now = time.monotonic()
+                if now >= resend:
+                    break
+                data = self.read_available(resend - now)
+                if data:
+                    self.rx_time = time.perf_counter()
+                    self.parse_frame(data)
+                    if self.decoder.frames > frames:
+                        self.log("📡 FORCED → UART MODE")
+                        return True
+            if time.monotonic() >= deadline:
+                break
+        self.logger.info("⚠️ No handshake reply within %.1fs, continuing", BOOT_TIMEOUT)
+        return False
+
+    def connect(self):
+        """Open the port and handshake; remembers the device on success"""
+        if not self.open_serial():
+            return False
+        self.decoder.reset()
+        try:
+            answered = self.switch_to_uart_mode()
+        except Exception as e:
+            if self.running:  # stop() closing the port mid-handshake is not a failure
+                self.log("❌ UART switch failed")
+            self.logger.info("UART switch error: %s", e)
+            try:
+                self.ser.close()
+            except:
+                pass
+            self.ser = None
+            return False
+        if not self.running:  # stop() landed mid-handshake
+            try:
+                self.ser.close()
+            except:
+                pass
+            self.ser = None
+            return False
+        if not answered:
+            self.stats.silent_handshakes += 1
+        if self.ser.port != self.last_device:
+            self.last_device = self.ser.port
+            self.identity = port_identity(self.ser.port)
+        self.log(f"✅ D4 Connected → {self.ser.port}")
+        return True
+
+    # ---------- command queue ----------
+    def submit(self, cmd: bytes, timeout=REPLY_TIMEOUT, retries=RETRIES):
+        """Queue a command from any thread; returns a Future for its reply Frame (None on timeout)"""
+        fut = Future()
+        if not self.running or self.ser is None:
+            fut.set_exception(ConnectionError(f"{self.reader_id} is not connected"))
+            return fut
+        self.commands.append(Command(cmd, timeout, retries, fut))
+        self._wake()
+        return fut
+
+    def _wake(self):
+        """Cut the reader thread's wait short so a queued command goes out now"""
+        try:
+            with self._wake_lock:
+                if self._wake_w is not None:
+                    os.write(self._wake_w, b'\0')
+                    return
+            if self.read_mode == "timeout" and self.ser:
+                self.ser.cancel_read()
+        except:
+            pass
+
+    def _open_wake_pipe(self):
+        if self.read_mode == "select" and self._wake_r is None:
+            r, w = os.pipe()
+            os.set_blocking(r, False)
+            os.set_blocking(w, False)
+            with self._wake_lock:
+                self._wake_r, self._wake_w = r, w
+
+    def _close_wake_pipe(self):
+        with self._wake_lock:
+            fds, self._wake_r, self._wake_w = (self._wake_r, self._wake_w), None, None
+        for fd in fds:
+            if fd is not None:
+                os.close(fd)
+
+    def _transmit(self, command, now):
+        if command.future is not None and command.future.cancelled():
+            return
+        command.sent_at = now
+        command.deadline = now + command.timeout
+        self.inflight = command
+        self.stats.commands += 1
+        if not self.send_frame(command.cmd):
+            self.inflight = None
+            command.resolve(error=ConnectionError(f"{self.reader_id}: write failed"))
+
+    def _pump(self, now):
+        """Retry or expire the command in flight, then start the next queued one"""
+        command = self.inflight
+        if command is not None and now >= command.deadline:
+            self.inflight = None
+            if command.retries > 0:
+                command.retries -= 1
+                self.stats.retries += 1
+                self.commands.appendleft(command)
+            else:
+                self.stats.timeouts += 1
+                command.resolve(None)
+        while self.inflight is None and self.commands:
+            self._transmit(self.commands.popleft(), now)
+
+    def _fail_pending(self, error):
+        command, self.inflight = self.inflight, None
+        if command is not None:
+            command.resolve(error=error)
+        while True:  # popleft, not list() + clear(): a concurrent submit() must not be lost
+            try:
+                command = self.commands.popleft()
+            except IndexError:
+                return
+            command.resolve(error=error)
+
+    def send_frame(self, cmd: bytes):
+        """Write one frame right away — reader thread only; use submit() elsewhere"""
+        if not self.ser or not self.ser.is_open:
+            self.logger.debug("❌ Cannot send - serial not open")
+            return False
+        frame = encode_frame(cmd)
+        try:
+            self.ser.write(frame)
+            if self.logger.isEnabledFor(TRACE):
+                self.logger.log(TRACE, "TX → %s", Hex(frame))
+            return True
+        except Exception as e:
+            self.logger.info("Send error: %s", e)
+            return False
+
+    def request_select_sequence(self, timeout=REPLY_TIMEOUT, retries=RETRIES):
+        """Rock-solid REQA → Anticollision → Select, driven by the replies (see SelectSequence).
+        Returns a Future for the list of reply frames."""
+        self.logger.debug("🔄 Starting REQA sequence...")
+        return SelectSequence(self, timeout, retries).future
+
+    def parse_frame(self, data: bytes):
+        """Parse incoming UART frames"""
+        if self.logger.isEnabledFor(TRACE):
+            self.logger.log(TRACE, "RX → %s (len=%d, pending=%d)", Hex(data), len(data), self.decoder.pending())
+        self.decoder.feed(data, self.handle_frame)
+
+    def handle_frame(self, frame):
+        """Resolve the command in flight, then look for UID response patterns in one valid frame.
+
+        `frame` holds memoryviews into the decoder buffer (see Decoder.feed) — copy anything kept.
+        """
+        command = self.inflight
+        expect_uid = command is not None and command.cmd[:1] in UID_COMMANDS
+        if command is not None and answers(command.cmd, frame.payload):  # else unsolicited, e.g. a streamed UID
+            now = time.monotonic()
+            self.inflight = None
+            self.stats.add_latency(stage_name(command.cmd), now - command.sent_at)
+            command.resolve(Frame(bytes(frame.payload), bytes(frame.raw)))
+            self._pump(now)
+        if self.logger.isEnabledFor(TRACE):
+            self.logger.log(TRACE, "✅ Valid frame: %s | Payload: %s", Hex(bytes(frame.raw)), Hex(bytes(frame.payload)))
+        found = extract_uid(frame.payload, raw=expect_uid)
+        if not found:
+            return
+        uid_bytes, kind = found
+        uid_str = uid_to_str(uid_bytes)
+        now = time.monotonic()
+        self.scheduler.activity(now)
+        if self.stats.first_scan_s is None:
+            self.stats.first_scan_s = now - self.stats.started
+        self.on_uid(uid_str, uid_bytes, kind)
+        self.stats.add_uid(time.perf_counter() - self.rx_time)
+        if self.log_uids:
+            self.log(UID_LOG[kind].format(uid_str))
+        if self.logger.isEnabledFor(TRACE):
+            self.logger.log(TRACE, "%s UID: %s = %s", kind, Hex(uid_bytes), uid_str)
+
+    def read_available(self, timeout):
+        """Block until bytes arrive or `timeout` expires; returns what was read (maybe b'')"""
+        timeout = max(timeout, 0.0)
+        if self.read_mode == "poll":
+            time.sleep(min(timeout, POLL_INTERVAL))
+        elif self.read_mode == "select":
+            fd = self.ser.fileno()
+            ready, _, _ = select.select([fd, self._wake_r], [], [], timeout)
+            if self._wake_r in ready:
+                try:
+                    os.read(self._wake_r, 4096)
+                except BlockingIOError:
+                    pass
+            if fd not in ready:
+                return b''
+        else:
+            timeout = round(timeout, 2)  # avoid reconfiguring the port for sub-10 ms changes
+            if self.ser.timeout != timeout:
+                self.ser.timeout = timeout
+            first = self.ser.read(1)
+            if not first:
+                return b''
+            waiting = self.ser.in_waiting
+            return first + (self.ser.read(waiting) if waiting else b'')
+        waiting = self.ser.in_waiting
+        return self.ser.read(waiting) if waiting else b''
+
+    def run(self):
+        """Main thread loop - wakes only when bytes arrive or a REQA is due"""
+        reqa = self.scheduler
+        self.stats = ReadStats()
+        self.logger.info("🚀 D4 reader started (read mode: %s)", self.read_mode)
+        backoff = RETRY_MIN
+        lost_at = None
+        self._open_wake_pipe()
+        try:
+            while self.running:
+                if not self.ser or not self.ser.is_open:
+                    self._fail_pending(ConnectionError(f"{self.reader_id} disconnected"))
+                    if self.connect():
+                        now = time.monotonic()
+                        if lost_at is not None:
+                            self.stats.add_reconnect(now - lost_at)
+                            self.logger.info("Reconnected in %.2fs", now - lost_at)
+                        elif self.stats.ready_s is None:
+                            self.stats.ready_s = now - self.stats.started
+                        lost_at = None
+                        backoff = RETRY_MIN
+                        self.connection(True)
+                        reqa.start(now)
+                    else:
+                        self.logger.debug("⏳ Waiting %.2fs before retry...", backoff)
+                        self._stopped.wait(backoff)
+                        backoff = min(backoff * 2, RETRY_MAX)
+                        continue
+
+                try:
+                    # Continuous scanning - REQA on the adaptive schedule, unless queued commands have the line
+                    now = time.monotonic()
+                    self._pump(now)
+                    if reqa.due(now):
+                        busy = self.inflight is not None
+                        if not busy:
+                            self._transmit(Command(CMD_REQA, min(REPLY_TIMEOUT, reqa.period * 0.75), retries=0), now)
+                        reqa.sent(now, skipped=busy)
+
+                    deadline = reqa.next_due if self.inflight is None else min(reqa.next_due, self.inflight.deadline)
+                    raw_data = self.read_available(deadline - time.monotonic())
+                    self.stats.wakeups += 1
+                    if raw_data:
+                        self.rx_time = time.perf_counter()
+                        self.stats.bytes += len(raw_data)
+                        if self.logger.isEnabledFor(TRACE):
+                            self.logger.log(TRACE, "📥 Received %d bytes", len(raw_data))
+                        self.parse_frame(raw_data)
+                except Exception as e:
+                    try:
+                        self.ser.close()
+                    except:
+                        pass
+                    self.ser = None
+                    lost_at = time.monotonic()
+                    self.log("❌ D4 Disconnected")
+                    self._fail_pending(ConnectionError(f"{self.reader_id} disconnected"))
+                    self.connection(False)
+                    self.logger.info("Connection lost: %s", e)
+        finally:
+            self._fail_pending(ConnectionError(f"{self.reader_id} stopped"))
+            self._close_wake_pipe()
+
+    def stop(self):
+        self.running = False
+        self._stopped.set()
+        self._wake()
+        if self.ser and self.ser.is_open:
+            self.ser.close()
+            self.logger.info("🛑 Serial port closed")
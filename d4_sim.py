@@ -0,0 +1,245 @@
+# d4_sim.py
+# Pseudo-terminal D4 simulator (Linux) — answers like the reader so the real code can run against it
+#   python d4_sim.py --rate 50 --seven 0.3 --noise 0.05      prints the pty path, runs until Ctrl-C
+#   D4_PORT=/dev/pts/5 python cyber_ninja_rfid_d4_FINAL.py     point the GUI at it
+#   python d4_sim.py --e2e 10 --rate 200 [--classify]         end-to-end throughput / latency run
+import argparse
+import os
+import random
+import select
+import sys
+import threading
+import time
+import tty
+from collections import defaultdict, deque
+from d4_codec import uid_frame, uid_to_str, HEADER, TAIL
+
+UART_MODE = 0x10
+REQA = 0x20
+ANTICOLL = 0x01
+SELECT = 0x21
+AUTH = (0x60, 0x61)
+
+
+def reply_frame(payload):
+    """Device-side frame: AA <len> <payload> <cs> BB"""
+    return bytes([HEADER, len(payload)]) + payload + b'\x00' + bytes([TAIL])
+
+
+class D4Simulator:
+    """A fake D4 on a pty pair.
+
+    Host frames (AA len cmd BB) are answered the way the reader does: UART mode
+    and AUTH get an ack, REQA and anticollision the UID of the card in the
+    field, select a SAK. On top of that `rate` unsolicited UID frames per second
+    are streamed for load tests, drawn from `pool` cards with `seven` of them
+    7-byte. `noise`, `truncate` and `bad_tail` are per-frame fault probabilities
+    (noise bytes never contain 0xAA, so every intact frame stays decodable).
+    """
+
+    def __init__(self, rate=0.0, seven=0.2, noise=0.0, truncate=0.0, bad_tail=0.0,
+                 pool=1000, card=True, reply_delay=0.0, seed=None):
+        self.rate = rate
+        self.noise = noise
+        self.truncate = truncate
+        self.bad_tail = bad_tail
+        self.reply_delay = reply_delay
+        self.rng = random.Random(seed)
+        self.cards = [self.rng.randbytes(7 if self.rng.random() < seven else 4) for _ in range(max(pool, 1))]
+        self.card = self.cards[0] if card else None  # the card resting in the field (None = empty)
+        self.path = None
+        self.running = False
+        self.sent_at = defaultdict(deque)  # uid string → send times of intact frames, for latency
+        self.stats = {"commands": 0, "frames": 0, "intact": 0, "bytes": 0,
+                      "noise": 0, "truncated": 0, "bad_tails": 0}
+        self._master = None
+        self._slave = None
+        self._lock = threading.Lock()
+        self._thread = None
+
+    # ---------- lifecycle ----------
+    def open(self):
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._master)
+        tty.setraw(self._slave)
+        self.path = os.ttyname(self._slave)
+        self.running = True
+        self._thread = threading.Thread(target=self._run, name="d4-sim", daemon=True)
+        self._thread.start()
+        return self
+
+    def close(self):
+        self.running = False
+        if self._thread is not None:
+            self._thread.join(1.0)
+        for fd in (self._master, self._slave):
+            if fd is not None:
+                os.close(fd)
+        self._master = self._slave = None
+
+    def __enter__(self):
+        return self.open()
+
+    def __exit__(self, *exc):
+        self.close()
+
+    # ---------- device side ----------
+    def _write(self, frame, uid=None):
+        """Send one frame, applying the configured faults"""
+        rng = self.rng
+        out = bytearray()
+        if self.noise and rng.random() < self.noise:
+            out += bytes(rng.randrange(0x00, HEADER) for _ in range(rng.randint(1, 32)))
+            self.stats["noise"] += 1
+        intact = True
+        if self.truncate and rng.random() < self.truncate:
+            frame = frame[:rng.randrange(1, len(frame))]
+            self.stats["truncated"] += 1
+            intact = False
+        elif self.bad_tail and rng.random() < self.bad_tail:
+            frame = frame[:-1] + bytes([rng.randrange(0x00, TAIL)])
+            self.stats["bad_tails"] += 1
+            intact = False
+        out += frame
+        with self._lock:
+            if uid is not None and intact:
+                self.sent_at[uid_to_str(uid)].append(time.perf_counter())
+                self.stats["intact"] += 1
+            self.stats["frames"] += 1
+            self.stats["bytes"] += len(out)
+        os.write(self._master, bytes(out))
+
+    def _answer(self, cmd):
+        self.stats["commands"] += 1
+        if self.reply_delay:
+            time.sleep(self.reply_delay)
+        op = cmd[0] if cmd else None
+        if op == UART_MODE or op in AUTH:
+            self._write(reply_frame(bytes([op, 0x00])))
+        elif op in (REQA, ANTICOLL) and self.card is not None:
+            self._write(uid_frame(self.card), self.card)
+        elif op == SELECT and self.card is not None:
+            self._write(reply_frame(bytes([SELECT, 0x08])))  # SAK 08: MIFARE Classic 1K
+
+    def _commands(self, buf):
+        """Pull complete host frames (AA len cmd BB) out of `buf`"""
+        while True:
+            start = buf.find(HEADER)
+            if start < 0:
+                buf.clear()
+                return
+            del buf[:start]
+            if len(buf) < 2 or len(buf) < buf[1] + 3:
+                return
+            n = buf[1]
+            if buf[n + 2] == TAIL:
+                yield bytes(buf[2:n + 2])
+                del buf[:n + 3]
+            else:
+                del buf[:1]
+
+    def _run(self):
+        buf = bytearray()
+        period = 1.0 / self.rate if self.rate > 0 else None
+        next_emit = time.monotonic() + (period or 0)
+        while self.running:
+            timeout = 0.1 if period is None else max(0.0, next_emit - time.monotonic())
+            try:
+                ready, _, _ = select.select([self._master], [], [], min(timeout, 0.1))
+                if ready:
+                    buf += os.read(self._master, 4096)
+                    for cmd in self._commands(buf):
+                        self._answer(cmd)
+                if period is not None:
+                    now = time.monotonic()
+                    while now >= next_emit:  # keep the long-run rate even if a wakeup was late
+                        card = self.rng.choice(self.cards)
+                        self._write(uid_frame(card), card)
+                        next_emit += period
+            except OSError:
+                return
+
+    # ---------- host side helpers ----------
+    def latency(self, uid_str):
+        """Seconds since the oldest unmatched intact frame carrying `uid_str` was written (None if none)"""
+        now = time.perf_counter()
+        with self._lock:
+            sent = self.sent_at.get(uid_str)
+            return now - sent.popleft() if sent else None
+
+
+# ==================== END-TO-END RUN ====================
+def e2e(sim, seconds, classify=False):
+    """Run the real D4Reader (and optionally classify_tag_smart) against `sim`"""
+    from d4_reader import D4Reader
+
+    received = [0]
+    latencies = []
+    if classify:
+        from classifier import classify_tag_smart
+
+    def on_uid(uid, uid_bytes, kind):
+        lat = sim.latency(uid)
+        if classify:
+            classify_tag_smart(uid)
+        received[0] += 1
+        if lat is not None:
+            latencies.append(lat)
+
+    reader = D4Reader(sim.path, "SIM", on_uid=on_uid)
+    thread = threading.Thread(target=reader.run, daemon=True)
+    thread.start()
+    time.sleep(seconds)
+    reader.stop()
+    thread.join(2.0)
+
+    latencies.sort()
+    pick = lambda q: latencies[min(int(len(latencies) * q), len(latencies) - 1)] * 1000 if latencies else 0.0
+    stats = reader.stats.snapshot()
+    return {
+        "seconds": seconds,
+        "sent_intact": sim.stats["intact"],
+        "received": received[0],
+        "uids_per_s": received[0] / seconds,
+        "latency_ms_p50": pick(0.5),
+        "latency_ms_p99": pick(0.99),
+        "latency_ms_max": latencies[-1] * 1000 if latencies else 0.0,
+        "startup_to_ready_s": stats["startup_to_ready_s"],
+        "sim": dict(sim.stats),
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Simulated D4 reader on a pseudo-terminal (Linux)")
+    ap.add_argument("--rate", type=float, default=0.0, help="unsolicited UID frames per second (default: only answer REQA)")
+    ap.add_argument("--seven", type=float, default=0.2, help="fraction of 7-byte UIDs")
+    ap.add_argument("--pool", type=int, default=1000, help="distinct cards to draw from")
+    ap.add_argument("--noise", type=float, default=0.0, help="probability of line garbage before a frame")
+    ap.add_argument("--truncate", type=float, default=0.0, help="probability a frame is cut short")
+    ap.add_argument("--bad-tail", type=float, default=0.0, help="probability a frame has a corrupt tail byte")
+    ap.add_argument("--no-card", action="store_true", help="empty field: REQA goes unanswered")
+    ap.add_argument("--reply-delay", type=float, default=0.0, help="seconds before answering a command")
+    ap.add_argument("--seed", type=int, default=None)
+    ap.add_argument("--e2e", type=float, metavar="SECONDS", help="run the real reader against the simulator and report")
+    ap.add_argument("--classify", action="store_true", help="with --e2e: classify every UID (writes to D4_TAG_DB!)")
+    args = ap.parse_args(argv)
+
+    sim = D4Simulator(args.rate, args.seven, args.noise, args.truncate, args.bad_tail,
+                      args.pool, not args.no_card, args.reply_delay, args.seed)
+    with sim:
+        if args.e2e:
+            for key, value in e2e(sim, args.e2e, args.classify).items():
+                print(f"{key:>20}: {value}")
+            return 0
+        print(sim.path, flush=True)
+        try:
+            while True:
+                time.sleep(1)
+        except KeyboardInterrupt:
+            pass
+        print(sim.stats, file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,363 @@
+# event_log.py
+# Append-only scan-event log — fixed-size binary records in rotating segments, read back through mmap
+#   python event_log.py                      summary of the log in D4_EVENT_LOG (default scan_events/)
+#   python event_log.py --csv scans.csv      export every event (streamed, nothing held in memory)
+import argparse
+import atexit
+import csv
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+import time
+from collections import Counter, namedtuple
+from file_lock import FileLock
+
+EVENT_LOG_DIR = os.environ.get("D4_EVENT_LOG", "scan_events")
+MAX_SEGMENT_BYTES = 64 * 1024 * 1024  # ~2M events per segment
+MAX_SEGMENT_AGE = 24 * 3600           # seconds; a new segment is started at least daily
+FLUSH_BYTES = 64 * 1024               # buffered records are written once this much is pending...
+FLUSH_INTERVAL = 1.0                  # ...or this many seconds after the first one was buffered
+
+MAGIC = b"D4EV"
+VERSION = 1
+SUFFIX = ".d4ev"
+NAMES_FILE = "names.json"
+
+# segment header: magic, version, record size, created (wall clock ns)
+HEADER = struct.Struct("<4sHHq")
+# record: wall clock ns, monotonic ns, UID as an integer, reader code, type code, UID length in bytes
+RECORD = struct.Struct("<qqQHHB3x")
+FIELDS = ("wall_ns", "mono_ns", "uid", "reader", "type", "uid_len")
+
+Event = namedtuple("Event", FIELDS)
+
+np = None
+_numpy_checked = False
+
+
+def _load_numpy():
+    global np, _numpy_checked
+    if not _numpy_checked:
+        _numpy_checked = True
+        try:
+            import numpy
+            np = numpy
+        except ImportError:
+            pass
+
+
+def uid_value(uid):
+    """(integer, byte length) of a decimal UID string; (0, 0) if it isn't one"""
+    if not (uid.isascii() and uid.isdigit()):
+        return 0, 0
+    value = int(uid)
+    if value >= 1 << 64:
+        return 0, 0
+    return value, max(4, (value.bit_length() + 7) // 8)
+
+
+def uid_string(value):
+    """Decimal UID string as shown in the GUI"""
+    return str(value).zfill(10)
+
+
+class NameTable:
+    """Reader IDs and tag types as small integers, kept in names.json next to the segments.
+
+    Code 0 is "" (unknown). Names are only ever appended, so codes stay valid for old segments.
+    Several processes (GUI, headless daemon) may share a directory: new codes are
+    handed out under names.json.lock after re-reading the file, never from a stale copy.
+    """
+
+    def __init__(self, directory):
+        self.path = os.path.join(directory, NAMES_FILE)
+        self.lock_path = self.path + ".lock"
+        self.lists = {"readers": [""], "types": [""]}
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                self.lists.update(json.load(f))
+        except (OSError, ValueError):
+            pass
+        self.codes = {kind: {name: i for i, name in enumerate(names)} for kind, names in self.lists.items()}
+
+    def code(self, kind, name):
+        name = name or ""
+        code = self.codes[kind].get(name)
+        if code is None:
+            with FileLock(self.lock_path):
+                self._load()  # another process may have added names since
+                code = self.codes[kind].get(name)
+                if code is None:
+                    code = self.codes[kind][name] = len(self.lists[kind])
+                    self.lists[kind].append(name)
+                    tmp = f"{self.path}.{os.getpid()}.tmp"
+                    with open(tmp, "w", encoding="utf-8") as f:
+                        json.dump(self.lists, f, ensure_ascii=False)
+                    os.replace(tmp, self.path)
+        return code
+
+    def name(self, kind, code):
+        names = self.lists[kind]
+        if code >= len(names):  # assigned by another process after we loaded
+            self._load()
+            names = self.lists[kind]
+        return names[code] if code < len(names) else f"#{code}"
+
+
+# ==================== WRITER ====================
+class EventLog:
+    """Buffered writer. append() only packs 32 bytes into a buffer; a background
+    thread writes it out every `flush_interval`, so a crash loses at most that much.
+    """
+
+    def __init__(self, directory=EVENT_LOG_DIR, max_bytes=MAX_SEGMENT_BYTES, max_age=MAX_SEGMENT_AGE,
+                 flush_bytes=FLUSH_BYTES, flush_interval=FLUSH_INTERVAL):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.max_age = max_age
+        self.flush_bytes = flush_bytes
+        self.flush_interval = flush_interval
+        os.makedirs(directory, exist_ok=True)
+        self.names = NameTable(directory)
+        self.appended = 0
+        self.segments = 0
+        self._buf = bytearray()
+        self._file = None
+        self._size = 0
+        self._opened = 0.0
+        self._lock = threading.Lock()
+        self._closed = threading.Event()
+        self._flusher = threading.Thread(target=self._flush_loop, name="event-log", daemon=True)
+        self._flusher.start()
+
+    def append(self, uid, reader=None, tag_type=None, wall_ns=None, mono_ns=None):
+        value, length = uid_value(uid)
+        with self._lock:
+            self._buf += RECORD.pack(time.time_ns() if wall_ns is None else wall_ns,
+                                     time.monotonic_ns() if mono_ns is None else mono_ns,
+                                     value, self.names.code("readers", reader),
+                                     self.names.code("types", tag_type), length)
+            self.appended += 1
+            if len(self._buf) >= self.flush_bytes:
+                self._write()
+
+    def flush(self):
+        with self._lock:
+            self._write()
+
+    def close(self):
+        self._closed.set()
+        with self._lock:
+            self._write()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def _flush_loop(self):
+        while not self._closed.wait(self.flush_interval):
+            self.flush()
+
+    def _write(self):
+        if not self._buf:
+            return
+        if (self._file is None or self._size + len(self._buf) > self.max_bytes
+                or time.monotonic() - self._opened >= self.max_age):
+            self._rotate()
+        self._file.write(self._buf)
+        self._file.flush()
+        self._size += len(self._buf)
+        self._buf.clear()
+
+    def _rotate(self):
+        if self._file is not None:
+            self._file.close()
+        stamp = time.strftime("%Y%m%d-%H%M%SZ", time.gmtime())  # UTC: local names repeat / go back across DST
+        n = 0
+        while True:
+            path = os.path.join(self.directory, f"scans-{stamp}-{n:03d}{SUFFIX}")
+            try:
+                self._file = open(path, "xb", buffering=0)
+                break
+            except FileExistsError:
+                n += 1
+        self._file.write(HEADER.pack(MAGIC, VERSION, RECORD.size, time.time_ns()))
+        self._size = HEADER.size
+        self._opened = time.monotonic()
+        self.segments += 1
+
+
+_event_log = None
+_event_log_lock = threading.Lock()
+
+
+def get_event_log():
+    """The shared event log for this process; flushed and closed at exit"""
+    global _event_log
+    with _event_log_lock:
+        if _event_log is None:
+            _event_log = EventLog()
+            atexit.register(_event_log.close)
+        return _event_log
+
+
+# ==================== READER ====================
+class Segment:
+    """One segment file, memory-mapped read-only. A torn last record (crash mid-write) is ignored."""
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            if size < HEADER.size:
+                raise ValueError(f"{path}: truncated header")
+            self.map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, record_size, self.created_ns = HEADER.unpack_from(self.map)
+        if magic != MAGIC or record_size != RECORD.size:
+            self.map.close()
+            raise ValueError(f"{path}: not a v{VERSION} event segment")
+        self.count = (size - HEADER.size) // RECORD.size
+
+    def __len__(self):
+        return self.count
+
+    def record(self, i):
+        return Event._make(RECORD.unpack_from(self.map, HEADER.size + i * RECORD.size))
+
+    def records(self, start=0, stop=None):
+        """Raw record tuples, unpacked one at a time straight from the mapping"""
+        stop = self.count if stop is None else min(stop, self.count)
+        view = memoryview(self.map)[HEADER.size + start * RECORD.size:HEADER.size + stop * RECORD.size]
+        try:
+            yield from RECORD.iter_unpack(view)
+        finally:
+            view.release()
+
+    def array(self):
+        """Zero-copy NumPy structured array over the mapping (NumPy is optional)"""
+        _load_numpy()
+        if np is None:
+            raise RuntimeError("NumPy is not installed")
+        return np.frombuffer(self.map, dtype=_event_dtype(), count=self.count, offset=HEADER.size)
+
+    def close(self):
+        try:
+            self.map.close()
+        except BufferError:  # a NumPy array from array() still uses it; unmapped once that is freed
+            pass
+
+
+def _event_dtype():
+    return np.dtype({"names": list(FIELDS), "offsets": [0, 8, 16, 24, 26, 28],
+                     "formats": ["<i8", "<i8", "<u8", "<u2", "<u2", "u1"], "itemsize": RECORD.size})
+
+
+class EventLogReader:
+    """Every segment of a log directory, oldest first, as one sequence of events.
+
+    Nothing is loaded up front: records are unpacked from the mappings as they
+    are iterated. Events written after the reader was opened need refresh().
+    """
+
+    def __init__(self, directory=EVENT_LOG_DIR):
+        self.directory = directory
+        self.segments = []
+        self.refresh()
+
+    def refresh(self):
+        self.close()
+        self.names = NameTable(self.directory)
+        try:
+            files = sorted(f for f in os.listdir(self.directory) if f.endswith(SUFFIX))
+        except FileNotFoundError:
+            files = []
+        for name in files:
+            try:
+                self.segments.append(Segment(os.path.join(self.directory, name)))
+            except (OSError, ValueError):
+                pass
+
+    def __len__(self):
+        return sum(len(s) for s in self.segments)
+
+    def __iter__(self):
+        for seg in self.segments:
+            yield from seg.records()
+
+    def events(self):
+        """Named events — handy, but one object per record; prefer iteration for bulk work"""
+        return map(Event._make, self)
+
+    def export_csv(self, f):
+        names = self.names
+        out = csv.writer(f)
+        out.writerow(("time", "mono_ns", "reader", "uid", "type"))
+        rows = 0
+        for wall_ns, mono_ns, uid, reader, tag_type, _ in self:
+            stamp = time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(wall_ns // 1_000_000_000))
+            out.writerow((f"{stamp}.{wall_ns // 1_000_000 % 1000:03d}", mono_ns, names.name("readers", reader),
+                          uid_string(uid), names.name("types", tag_type)))
+            rows += 1
+        return rows
+
+    def summary(self):
+        readers = Counter()
+        types = Counter()
+        first = last = None
+        for wall_ns, _, _, reader, tag_type, _ in self:
+            readers[reader] += 1
+            types[tag_type] += 1
+            if first is None:
+                first = wall_ns
+            last = wall_ns
+        return {
+            "segments": len(self.segments),
+            "events": sum(readers.values()),
+            "first": first,
+            "last": last,
+            "readers": {self.names.name("readers", c): n for c, n in readers.most_common()},
+            "types": {self.names.name("types", c): n for c, n in types.most_common()},
+        }
+
+    def close(self):
+        for seg in self.segments:
+            seg.close()
+        self.segments = []
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Summarize or export the binary scan-event log")
+    ap.add_argument("directory", nargs="?", default=EVENT_LOG_DIR)
+    ap.add_argument("--csv", metavar="OUT", help="export every event as CSV ('-' for stdout)")
+    args = ap.parse_args(argv)
+
+    reader = EventLogReader(args.directory)
+    try:
+        if args.csv:
+            dst = sys.stdout if args.csv == "-" else open(args.csv, "w", newline="", encoding="utf-8")
+            try:
+                rows = reader.export_csv(dst)
+            finally:
+                if dst is not sys.stdout:
+                    dst.close()
+            print(f"{rows} events exported", file=sys.stderr)
+            return 0
+        info = reader.summary()
+        fmt = lambda ns: time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ns / 1e9)) if ns else "-"
+        print(f"{info['events']} events in {info['segments']} segments, {fmt(info['first'])} → {fmt(info['last'])}")
+        for title in ("readers", "types"):
+            print(f"{title}:")
+            for name, n in info[title].items():
+                print(f"{n:>10}  {name or '?'}")
+    finally:
+        reader.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,178 @@
+# history_model.py
+# Scan history for both GUIs — a list model over a bounded deque, shown in a virtualized one-column table,
+# and the search box that queries the event log behind it
+import os
+import threading
+import time
+from collections import deque, namedtuple
+from PyQt6.QtCore import Qt, QAbstractListModel, QModelIndex, QObject, pyqtSignal
+from PyQt6.QtGui import QColor
+from PyQt6.QtWidgets import QTableView, QAbstractItemView, QHeaderView, QLineEdit
+from scan_index import ScanIndex, RANGE_LIMIT, parse_query, format_ns
+
+HISTORY_DEPTH = max(1, int(os.environ.get("D4_HISTORY_DEPTH", "5000")))  # 0 would make add() pop from an empty deque
+UID_ROLE = Qt.ItemDataRole.UserRole
+
+Scan = namedtuple("Scan", "ts reader uid type color")
+
+
+class ScanHistoryModel(QAbstractListModel):
+    """Newest scan at row 0. Rows are formatted only when the view asks for them,
+    i.e. for the visible ones; the oldest scan falls off once `depth` is reached."""
+
+    def __init__(self, depth=HISTORY_DEPTH, parent=None):
+        super().__init__(parent)
+        self.rows = deque(maxlen=depth)
+        self.show_reader = False
+        self._colors = {}
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or index.row() >= len(self.rows):
+            return None
+        scan = self.rows[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            source = f"[{scan.reader}] " if self.show_reader and scan.reader else ""
+            return f"[{time.strftime('%H:%M:%S', time.localtime(scan.ts))}] {source}{scan.type} | {scan.uid}"
+        if role == Qt.ItemDataRole.ForegroundRole:
+            color = self._colors.get(scan.color)
+            if color is None:
+                color = self._colors[scan.color] = QColor(scan.color)
+            return color
+        if role == UID_ROLE:
+            return scan.uid
+        return None
+
+    def add(self, uid, tag_type, color, reader=None, ts=None):
+        """Prepend one scan — O(1), the view only shifts its row indexes"""
+        if len(self.rows) == self.rows.maxlen:
+            last = len(self.rows) - 1
+            self.beginRemoveRows(QModelIndex(), last, last)
+            self.rows.pop()
+            self.endRemoveRows()
+        self.beginInsertRows(QModelIndex(), 0, 0)
+        self.rows.appendleft(Scan(time.time() if ts is None else ts, reader, uid, tag_type, color))
+        self.endInsertRows()
+
+    def set_show_reader(self, show):
+        if show != self.show_reader:
+            self.show_reader = show
+            if self.rows:
+                self.dataChanged.emit(self.index(0), self.index(len(self.rows) - 1))
+
+
+def history_view(model, style):
+    """One-column, header-less QTableView with fixed row heights.
+
+    Only visible rows are painted and asked for data. A QListView would do the
+    same, but it re-lays out every row on each insert (O(depth) per scan); the
+    table's fixed-size rows keep a head insert O(1) at any history depth.
+    """
+    view = QTableView()
+    view.setModel(model)
+    view.setStyleSheet(style)
+    view.horizontalHeader().hide()
+    view.horizontalHeader().setStretchLastSection(True)
+    rows = view.verticalHeader()
+    rows.hide()
+    rows.setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+    rows.setDefaultSectionSize(view.fontMetrics().height() + 6)
+    view.setShowGrid(False)
+    view.setWordWrap(False)
+    view.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+    view.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+    return view
+
+
+class HistorySearch(QObject):
+    """The history search box: a UID shows first / last seen in the status line, a time
+    or time range swaps the history view to the matching scans; clearing it goes back
+    to the live history.
+
+    The ScanIndex is built from the event log on a worker thread (seconds for millions
+    of events); scans recorded meanwhile are queued and added once it is ready.
+    """
+    loaded = pyqtSignal(object)  # ScanIndex, from the loader thread
+
+    def __init__(self, event_log, view, live_model, status, style, parent=None):
+        super().__init__(parent)
+        self.event_log = event_log
+        self.view = view
+        self.live_model = live_model
+        self.status = status      # callable taking the status-line text
+        self.show_reader = False  # reader column in result rows (several readers)
+        self.index = None
+        self.pending = []
+        self.results = None
+        self.colors = {}          # tag type → history color, for result rows
+        self.field = QLineEdit()
+        self.field.setPlaceholderText("UID, or 14:00-14:05 — Enter to search")
+        self.field.setClearButtonEnabled(True)
+        self.field.setMinimumWidth(360)
+        self.field.setStyleSheet(style)
+        self.field.returnPressed.connect(self.search)
+        self.field.textChanged.connect(lambda text: text or self.search())
+        self.loaded.connect(self._on_loaded)
+
+    def load(self):
+        """Index the event log off the GUI thread; everything recorded from here on arrives via record()"""
+        self.event_log.flush()
+        until = time.time_ns()
+        directory, names = self.event_log.directory, self.event_log.names
+        threading.Thread(target=lambda: self.loaded.emit(ScanIndex.from_log(directory, names, until)),
+                         name="scan-index", daemon=True).start()
+
+    def _on_loaded(self, index):
+        for scan in self.pending:
+            index.add_scan(*scan)
+        self.pending = []
+        self.index = index
+
+    def record(self, uid, reader, tag_type, color):
+        """Log one scan and make it searchable"""
+        now = time.time_ns()
+        self.event_log.append(uid, reader, tag_type, wall_ns=now)
+        self.colors[tag_type] = color
+        if self.index is None:
+            self.pending.append((uid, reader, tag_type, now))
+        else:
+            self.index.add_scan(uid, reader, tag_type, now)
+
+    def show(self, model):
+        """Point the history view at `model`, freeing the previous search results"""
+        old, self.results = self.results, (model if model is not self.live_model else None)
+        self.view.setModel(model)
+        if old is not None and old is not model:
+            old.deleteLater()
+
+    def search(self):
+        query = self.field.text().strip()
+        if not query:
+            self.show(self.live_model)
+            return
+        if self.index is None:
+            self.status("🔍 Scan history is still loading — try again in a moment")
+            return
+        try:
+            kind, value = parse_query(query)
+        except ValueError:
+            self.status(f"🔍 Not a UID or time range: {query}")
+            return
+        if kind == "uid":
+            hit = self.index.lookup(value)
+            if hit is None:
+                self.status(f"🔍 {value}: never scanned")
+            else:
+                self.status(f"🔍 {value}: first {format_ns(hit[0])} · last {format_ns(hit[1])} · {hit[2]} scans")
+            return
+        start, end = value
+        total, rows = self.index.range(start, end)
+        results = ScanHistoryModel(RANGE_LIMIT, parent=self)
+        results.set_show_reader(self.show_reader)
+        for wall_ns, uid, reader, tag_type in rows:
+            results.add(uid, tag_type, self.colors.get(tag_type, "#ffffff"), reader, wall_ns / 1e9)
+        self.show(results)
+        shown = f" (first {len(rows)} shown)" if len(rows) < total else ""
+        self.status(f"🔍 {total} scans {format_ns(start)} → {format_ns(end)}{shown} — clear the search for live history")
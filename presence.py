@@ -0,0 +1,91 @@
+# presence.py
+# Tag presence tracking — turns the raw REQA read stream into arrived / present / departed events
+import time
+
+ARRIVED = "tag_arrived"
+PRESENT = "tag_present"
+DEPARTED = "tag_departed"
+
+DEPART_AFTER = 1.6    # seconds without a read before a tag counts as gone (~3 missed REQA cycles)
+PRESENT_EVERY = 5.0   # dwell: a tag_present heartbeat this often while a tag stays on the reader
+RATE_SMOOTHING = 0.3  # EWMA weight of the newest read interval
+
+
+class TagPresence:
+    """One tag on one reader, from its first read until it departs"""
+    __slots__ = ("uid", "reader", "first_seen", "last_seen", "last_event", "reads", "interval")
+
+    def __init__(self, uid, reader, now):
+        self.uid = uid
+        self.reader = reader
+        self.first_seen = now
+        self.last_seen = now
+        self.last_event = now
+        self.reads = 1
+        self.interval = 0.0  # smoothed seconds between reads
+
+    @property
+    def dwell(self):
+        return self.last_seen - self.first_seen
+
+    @property
+    def rate(self):
+        """Smoothed reads/sec — drops as the tag drifts to the edge of the field"""
+        return 1.0 / self.interval if self.interval > 0 else 0.0
+
+    def as_dict(self):
+        return {"uid": self.uid, "reader": self.reader, "reads": self.reads,
+                "dwell": round(self.dwell, 3), "rate": round(self.rate, 2)}
+
+
+class PresenceTracker:
+    """Duplicate-read suppression keyed by (reader, uid).
+
+    read() returns (event, tag, departed) where event is ARRIVED for a new tag,
+    PRESENT once every `present_every` seconds while it stays, else None.
+    departed is the previous stay of the same tag when it had already timed out
+    but expire() had not run yet — report it before the new arrival. expire()
+    returns the tags not read for `depart_after` seconds and forgets them.
+    """
+
+    def __init__(self, depart_after=DEPART_AFTER, present_every=PRESENT_EVERY, clock=time.monotonic):
+        self.depart_after = depart_after
+        self.present_every = present_every
+        self.clock = clock
+        self.present = {}
+        self.reads = 0
+        self.arrivals = 0
+        self.suppressed = 0
+
+    def read(self, uid, reader=None, now=None):
+        now = self.clock() if now is None else now
+        self.reads += 1
+        tag = self.present.get((reader, uid))
+        if tag is None or now - tag.last_seen > self.depart_after:
+            # new, or gone long enough that expire() just hasn't run yet
+            departed = tag
+            tag = self.present[(reader, uid)] = TagPresence(uid, reader, now)
+            self.arrivals += 1
+            return ARRIVED, tag, departed
+
+        gap = now - tag.last_seen
+        tag.interval = gap if tag.reads == 1 else tag.interval + RATE_SMOOTHING * (gap - tag.interval)
+        tag.reads += 1
+        tag.last_seen = now
+        self.suppressed += 1
+        if now - tag.last_event >= self.present_every:
+            tag.last_event = now
+            return PRESENT, tag, None
+        return None, tag, None
+
+    def expire(self, now=None):
+        now = self.clock() if now is None else now
+        gone = [key for key, tag in self.present.items() if now - tag.last_seen > self.depart_after]
+        return [self.present.pop(key) for key in gone]
+
+    def on_reader(self, reader):
+        return [tag for (r, _), tag in self.present.items() if r == reader]
+
+    def stats(self):
+        return {"present": len(self.present), "reads": self.reads,
+                "arrivals": self.arrivals, "suppressed": self.suppressed}
@@ -0,0 +1,209 @@
+# scan_index.py
+# Scan-history queries — first/last seen per UID and time-range lookups over the event log
+#   python scan_index.py --uid 0012345678              first seen, last seen, scan count
+#   python scan_index.py --since 14:00 --until 14:05   every scan in that window (today unless a date is given)
+import argparse
+import sys
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from event_log import EVENT_LOG_DIR, EventLogReader, uid_string, uid_value
+
+RANGE_LIMIT = 1000  # rows returned by range() unless asked otherwise
+
+np = None
+_numpy_checked = False
+
+
+def _load_numpy():
+    global np, _numpy_checked
+    if not _numpy_checked:
+        _numpy_checked = True
+        try:
+            import numpy
+            np = numpy
+        except ImportError:
+            pass
+
+
+def parse_time(text, day=None):
+    """Wall-clock ns for "HH:MM[:SS]" (on `day`, default today) or "YYYY-MM-DD[ T]HH:MM[:SS]" """
+    text = text.strip().replace("T", " ")
+    if " " not in text:
+        text = f"{day or time.strftime('%Y-%m-%d')} {text}"
+    for fmt in ("%Y-%m-%d %H:%M:%S", "%Y-%m-%d %H:%M"):
+        try:
+            return int(time.mktime(time.strptime(text, fmt))) * 1_000_000_000
+        except ValueError:
+            pass
+    raise ValueError(f"not a time: {text!r}")
+
+
+def parse_range(text, day=None):
+    """(start_ns, end_ns) for "A-B" / "A - B" with A and B as parse_time() takes them; a single time runs to now.
+    A bare time for B is on A's date ("2026-10-10 14:00-14:05" stays on the 10th)."""
+    text = text.strip()
+    for i in [i for i, c in enumerate(text) if c == "-"] + [None]:
+        try:
+            if i is None:
+                return parse_time(text, day), time.time_ns()
+            start = parse_time(text[:i], day)
+            return start, parse_time(text[i + 1:], time.strftime("%Y-%m-%d", time.localtime(start // 1_000_000_000)))
+        except ValueError:
+            pass
+    raise ValueError(f"not a time range: {text!r}")
+
+
+def parse_query(text, day=None):
+    """("uid", uid) for a UID as the GUIs show it (10+ ASCII digits), else ("range", (start_ns, end_ns));
+    ValueError if it is neither. "²" / "٣" or a short number is no UID and no time either."""
+    text = text.strip()
+    if text.isascii() and text.isdigit() and len(text) >= 10:
+        return "uid", text
+    return "range", parse_range(text, day)
+
+
+class ScanIndex:
+    """Two indexes over recorded scans, both updated by add():
+
+    by_uid   UID → [first_seen_ns, last_seen_ns, count]   (hash, O(1) lookups)
+    times    wall-clock ns of every scan, sorted, with the UID / reader / type
+             codes in parallel arrays — range() bisects it, O(log n)
+    Columns are typed arrays (20 bytes per scan), not per-scan Python objects.
+    Reader and type codes are the event log's (see event_log.NameTable).
+    """
+
+    def __init__(self, names):
+        self.names = names
+        self.by_uid = {}
+        self.times = array("q")
+        self.uids = array("Q")
+        self.readers = array("H")
+        self.types = array("H")
+
+    @classmethod
+    def from_log(cls, directory=EVENT_LOG_DIR, names=None, until_ns=None):
+        """Index every valid scan in the log (before `until_ns`, if given).
+        Scans logged without a UID (uid_len 0, e.g. "INVALID") are skipped, as add_scan() skips them."""
+        reader = EventLogReader(directory)
+        index = cls(names or reader.names)
+        try:
+            _load_numpy()
+            if np is not None and reader.segments:
+                events = np.concatenate([seg.array() for seg in reader.segments])
+                keep = events["uid_len"] != 0
+                if until_ns is not None:
+                    keep &= events["wall_ns"] < until_ns
+                index._load_arrays(events[keep])
+            else:
+                for wall_ns, _, uid, reader_code, type_code, uid_len in reader:
+                    if uid_len and (until_ns is None or wall_ns < until_ns):
+                        index.add(wall_ns, uid, reader_code, type_code)
+        finally:
+            reader.close()
+        return index
+
+    def _load_arrays(self, events):
+        """Bulk load from a NumPy record array (one sort and one pass over unique UIDs)"""
+        if len(events) and not (np.diff(events["wall_ns"]) >= 0).all():
+            events = events[np.argsort(events["wall_ns"], kind="stable")]
+        for column, name in ((self.times, "wall_ns"), (self.uids, "uid"), (self.readers, "reader"), (self.types, "type")):
+            column.frombytes(np.ascontiguousarray(events[name]).astype(column.typecode).tobytes())
+        uids, times = events["uid"], events["wall_ns"]
+        unique, first, counts = np.unique(uids, return_index=True, return_counts=True)
+        last = len(uids) - 1 - np.unique(uids[::-1], return_index=True)[1]
+        self.by_uid = {u: [f, l, c] for u, f, l, c in zip(unique.tolist(), times[first].tolist(),
+                                                           times[last].tolist(), counts.tolist())}
+
+    def add(self, wall_ns, uid, reader_code=0, type_code=0):
+        """Record one scan; uid is the integer UID (event_log.uid_value)"""
+        entry = self.by_uid.get(uid)
+        if entry is None:
+            self.by_uid[uid] = [wall_ns, wall_ns, 1]
+        else:
+            entry[0] = min(entry[0], wall_ns)
+            entry[1] = max(entry[1], wall_ns)
+            entry[2] += 1
+        if not self.times or wall_ns >= self.times[-1]:
+            self.times.append(wall_ns)
+            self.uids.append(uid)
+            self.readers.append(reader_code)
+            self.types.append(type_code)
+        else:  # clock stepped back: keep the order (O(n), rare)
+            i = bisect_right(self.times, wall_ns)
+            self.times.insert(i, wall_ns)
+            self.uids.insert(i, uid)
+            self.readers.insert(i, reader_code)
+            self.types.insert(i, type_code)
+
+    def add_scan(self, uid, reader=None, tag_type=None, wall_ns=None):
+        """add() with a UID string and reader / type names, as the GUIs see them"""
+        value, length = uid_value(uid)
+        if length:
+            self.add(time.time_ns() if wall_ns is None else wall_ns, value,
+                     self.names.code("readers", reader), self.names.code("types", tag_type))
+
+    def __len__(self):
+        return len(self.times)
+
+    def lookup(self, uid):
+        """(first_seen_ns, last_seen_ns, count) for a UID string, or None if never scanned"""
+        value, length = uid_value(uid)
+        entry = self.by_uid.get(value) if length else None
+        return tuple(entry) if entry else None
+
+    def range(self, start_ns, end_ns, limit=RANGE_LIMIT):
+        """(total, rows) for scans with start_ns <= time <= end_ns; rows are the first `limit`
+        as (wall_ns, uid string, reader, type), oldest first"""
+        lo = bisect_left(self.times, start_ns)
+        hi = bisect_right(self.times, end_ns)
+        names = self.names
+        rows = [(self.times[i], uid_string(self.uids[i]), names.name("readers", self.readers[i]),
+                 names.name("types", self.types[i])) for i in range(lo, min(hi, lo + limit))]
+        return hi - lo, rows
+
+
+def format_ns(ns):
+    return time.strftime("%Y-%m-%d %H:%M:%S", time.localtime(ns // 1_000_000_000))
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Query the scan-event log: when was a UID seen, what scanned when")
+    ap.add_argument("directory", nargs="?", default=EVENT_LOG_DIR)
+    ap.add_argument("--uid", action="append", help="first / last seen and count (repeatable)")
+    ap.add_argument("--since", help="HH:MM[:SS] or 'YYYY-MM-DD HH:MM[:SS]'")
+    ap.add_argument("--until", help="same formats (default: now)")
+    ap.add_argument("--date", help="YYYY-MM-DD for bare --since/--until times (default today)")
+    ap.add_argument("--limit", type=int, default=RANGE_LIMIT)
+    args = ap.parse_args(argv)
+    if not args.uid and not args.since:
+        ap.error("give --uid and/or --since")
+
+    t0 = time.perf_counter()
+    index = ScanIndex.from_log(args.directory)
+    print(f"{len(index)} scans, {len(index.by_uid)} UIDs indexed in {time.perf_counter() - t0:.2f}s", file=sys.stderr)
+
+    for uid in args.uid or []:
+        t0 = time.perf_counter()
+        hit = index.lookup(uid)
+        took = (time.perf_counter() - t0) * 1e6
+        if hit is None:
+            print(f"{uid}: never scanned ({took:.0f} us)")
+        else:
+            print(f"{uid}: first {format_ns(hit[0])} · last {format_ns(hit[1])} · {hit[2]} scans ({took:.0f} us)")
+
+    if args.since:
+        start = parse_time(args.since, args.date)
+        end = parse_time(args.until, args.date) if args.until else time.time_ns()
+        t0 = time.perf_counter()
+        total, rows = index.range(start, end, args.limit)
+        took = (time.perf_counter() - t0) * 1e6
+        for wall_ns, uid, reader, tag_type in rows:
+            print(f"{format_ns(wall_ns)}  {reader:<14} {uid}  {tag_type}")
+        shown = f", first {len(rows)} shown" if len(rows) < total else ""
+        print(f"{total} scans {format_ns(start)} → {format_ns(end)}{shown} ({took:.0f} us)", file=sys.stderr)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,558 @@
+# tag_store.py
+# Process-wide learned tag store — learned_tags.json is parsed once and served from memory
+import argparse
+import json
+import logging
+import os
+import sqlite3
+import sys
+import threading
+from contextlib import nullcontext
+from file_lock import FileLock
+
+DB_PATH = os.environ.get("D4_TAG_DB", "learned_tags.json")
+SQLITE_SUFFIXES = (".db", ".sqlite", ".sqlite3")
+JOURNAL_SUFFIX = ".journal"
+CORRUPT_SUFFIX = ".corrupt"  # a snapshot that failed to parse is moved here, never overwritten
+COMPACT_EVERY = 1000  # journal entries before the snapshot is rewritten in the background
+
+log = logging.getLogger("d4.tag_store")
+
+
+def new_record(freq, raw):
+    return {
+        "raw": raw,
+        "frequency": freq,
+        "assigned_type": "Unknown",
+        "assigned_subtype": "Pending",
+        "notes": "Auto-saved from D4"
+    }
+
+
+class TagStore:
+    """In-memory copy of the learned tag DB, reloaded only when the file changes on disk.
+
+    Writes go to an append-only journal (one fsync'd JSON line per insert/label)
+    that is replayed over the snapshot on load and periodically folded back into
+    it by a background compaction. Appends, compaction and full reloads hold an
+    advisory lock on <path>.lock, so several processes can share one DB.
+    """
+
+    def __init__(self, path=DB_PATH, journal=True):
+        self.path = path
+        self.journal_path = path + JOURNAL_SUFFIX
+        self.compacting_path = self.journal_path + ".compacting"
+        self.lock_path = path + ".lock"
+        self.corrupt_path = path + CORRUPT_SUFFIX
+        self.use_journal = journal
+        self.snapshot_ok = True  # False while the snapshot could not be read: compaction would lose it
+        self.tags = {}
+        self.hits = 0
+        self.misses = 0
+        self.pending = 0        # journal entries not yet folded into the snapshot
+        self.compactions = 0
+        self._sig = None
+        self._journal = None
+        self._journal_pos = 0
+        self._compactor = None
+        self._lock = threading.RLock()
+
+    # ---------- disk state ----------
+    def _stat(self, path):
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def _signature(self):
+        return (self._stat(self.path), self._stat(self.compacting_path), self._stat(self.journal_path))
+
+    def _read_snapshot(self):
+        self.snapshot_ok = True
+        if not os.path.exists(self.path):
+            with open(self.path, "w") as f:
+                json.dump({}, f)
+            return {}
+        try:
+            with open(self.path) as f:
+                tags = json.load(f)
+        except OSError as e:
+            log.error("%s unreadable (%s) — serving the journal only, compaction paused", self.path, e)
+            self.snapshot_ok = False
+            return {}
+        except ValueError as e:
+            # keep the damaged file for repair; the journal still holds everything written since the last compaction
+            kept = self.path
+            if not os.path.exists(self.corrupt_path):
+                os.replace(self.path, self.corrupt_path)
+                kept = self.corrupt_path
+            log.error("%s is corrupt (%s) — kept as %s; compaction is off until %s is repaired or removed",
+                      self.path, e, kept, self.corrupt_path)
+            self.snapshot_ok = False
+            return {}
+        return tags
+
+    def _apply(self, entry):
+        uid = entry.get("uid")
+        if uid is None:
+            return
+        if entry.get("op") == "add":
+            self.tags.setdefault(uid, entry.get("rec", {}))
+        elif entry.get("op") == "label":
+            self.tags.setdefault(uid, {}).update(entry.get("set", {}))
+
+    def _replay(self, path, start=0):
+        """Apply journal lines from byte offset `start`; returns the offset after the last complete line"""
+        try:
+            f = open(path, "rb")
+        except OSError:
+            return start
+        with f:
+            f.seek(start)
+            pos = start
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break  # torn write from a crash — stop before it
+                pos += len(line)
+                try:
+                    self._apply(json.loads(line))
+                except:
+                    continue
+                self.pending += 1
+        return pos
+
+    def _refresh(self, locked=False):
+        """Reload from disk if another process touched the files. Returns True on a cache hit.
+        `locked`: the caller already holds the file lock."""
+        sig = self._signature()
+        if sig[0] is not None and sig == self._sig:
+            return True
+        old = self._sig
+        if (old is not None and sig[:2] == old[:2] and sig[2] is not None and old[2] is not None
+                and sig[2][2] == old[2][2] and sig[2][1] > old[2][1]):
+            # only the journal grew (another station appended) — replay the tail
+            self._journal_pos = self._replay(self.journal_path, self._journal_pos)
+        else:
+            # snapshot, .compacting and journal must be read as one state, not mid-compaction
+            with nullcontext() if locked else FileLock(self.lock_path):
+                self.tags = self._read_snapshot()
+                self.pending = 0
+                if self.use_journal:
+                    self._replay(self.compacting_path)
+                    self._journal_pos = self._replay(self.journal_path)
+                sig = self._signature()
+        self._sig = sig
+        return False
+
+    def _count(self, hit):
+        if hit:
+            self.hits += 1
+        else:
+            self.misses += 1
+
+    def _write_snapshot(self, tags):
+        tmp = f"{self.path}.{os.getpid()}.tmp"
+        with open(tmp, "w") as f:
+            json.dump(tags, f, indent=4)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self.path)  # atomic — readers see the old or the new file, never half of one
+
+    def _close_journal(self):
+        if self._journal is not None:
+            self._journal.close()
+            self._journal = None
+
+    def _append(self, entry):
+        """Apply `entry` and persist it. Under the file lock other processes' writes are
+        replayed first, so nothing of theirs is overwritten or appended past."""
+        with FileLock(self.lock_path):
+            self._refresh(locked=True)
+            self._apply(entry)
+            if not self.use_journal:
+                self._write_snapshot(self.tags)
+                self._sig = self._signature()
+                return
+            if self._journal is not None:
+                st = self._stat(self.journal_path)
+                if st is None or st[2] != os.fstat(self._journal.fileno()).st_ino:
+                    self._close_journal()  # another process compacted: our handle is the renamed file
+            if self._journal is None:
+                self._journal = open(self.journal_path, "ab")
+            if os.fstat(self._journal.fileno()).st_size > self._journal_pos:
+                # drop a torn line left by a crash so the next entry starts clean
+                self._journal.truncate(self._journal_pos)
+            data = (json.dumps(entry, separators=(",", ":")) + "\n").encode()
+            self._journal.write(data)
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+            self._journal_pos += len(data)
+            self.pending += 1
+            self._sig = self._signature()  # our own write must not look like a foreign edit
+        if self.pending >= COMPACT_EVERY:
+            self.compact(background=True)
+
+    # ---------- compaction ----------
+    def compact(self, background=False):
+        """Fold the journal into a fresh snapshot (write temp file + atomic rename)"""
+        if not background:
+            self._join_compactor()
+        with self._lock:
+            if self._compactor is not None and self._compactor.is_alive():
+                return
+            with FileLock(self.lock_path):
+                self._refresh(locked=True)  # the snapshot must include other processes' entries
+                if not self.snapshot_ok or os.path.exists(self.corrupt_path):
+                    return  # folding the journal into a snapshot we could not read would drop every older tag
+                self._close_journal()
+                if os.path.exists(self.journal_path):
+                    if os.path.exists(self.compacting_path):
+                        # leftover from an interrupted compaction: keep both, in order
+                        with open(self.journal_path, "rb") as src, open(self.compacting_path, "ab") as dst:
+                            dst.write(src.read())
+                        os.remove(self.journal_path)
+                    else:
+                        os.replace(self.journal_path, self.compacting_path)
+                tags = {uid: dict(rec) for uid, rec in self.tags.items()}
+                before = self._signature()[:2]
+                self._journal_pos = 0
+                self.pending = 0
+                self._sig = self._signature()
+        if background:
+            self._compactor = threading.Thread(target=self._finish_compaction, args=(tags, before), daemon=True)
+            self._compactor.start()
+        else:
+            self._finish_compaction(tags, before)
+
+    def _finish_compaction(self, tags, before):
+        with FileLock(self.lock_path):
+            # if another process compacted since (snapshot or .compacting changed), its snapshot supersedes ours
+            done = self._signature()[:2] == before
+            if done:
+                self._write_snapshot(tags)
+                try:
+                    os.remove(self.compacting_path)
+                except OSError:
+                    pass
+            sig = self._signature()
+        with self._lock:
+            if done:
+                self.compactions += 1
+                if self._sig is not None and self._sig[2] == sig[2]:
+                    self._sig = sig  # nothing appended meanwhile: our own snapshot is no foreign edit
+
+    def _join_compactor(self):
+        with self._lock:
+            compactor = self._compactor
+        if compactor is not None:
+            compactor.join()
+
+    def close(self):
+        self._join_compactor()
+        with self._lock:
+            self._close_journal()
+
+    # ---------- public API ----------
+    def get(self, uid):
+        with self._lock:
+            self._count(self._refresh())
+            return self.tags.get(uid)
+
+    def snapshot(self):
+        """Shallow copy of the whole DB (uid -> record)"""
+        with self._lock:
+            self._count(self._refresh())
+            return dict(self.tags)
+
+    def replace(self, db):
+        self._join_compactor()
+        with self._lock, FileLock(self.lock_path):
+            self._close_journal()
+            self.tags = dict(db)
+            self._write_snapshot(self.tags)
+            for path in (self.journal_path, self.compacting_path):
+                try:
+                    os.remove(path)
+                except OSError:
+                    pass
+            self._journal_pos = 0
+            self.pending = 0
+            self._sig = self._signature()
+
+    def add_unknown(self, uid, freq, raw):
+        """Remember a first-seen tag. Returns False if the UID is already known."""
+        with self._lock:
+            self._count(self._refresh())
+            if uid in self.tags:
+                return False
+            self._append({"op": "add", "uid": uid, "rec": new_record(freq, raw)})
+            return True
+
+    def label(self, uid, tag_type, subtype, notes=""):
+        with self._lock:
+            self._count(self._refresh())
+            fields = {
+                "assigned_type": tag_type,
+                "assigned_subtype": subtype or "Unknown",
+                "notes": notes or "",
+            }
+            self._append({"op": "label", "uid": uid, "set": fields})
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "tags": len(self.tags),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / total if total else 0.0,
+            "journal_pending": self.pending,
+            "compactions": self.compactions,
+        }
+
+
+# ==================== SQLITE BACKEND ====================
+COLUMNS = ("raw", "frequency", "assigned_type", "assigned_subtype", "notes")
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tags (
+    uid TEXT PRIMARY KEY,
+    raw TEXT,
+    frequency TEXT,
+    assigned_type TEXT,
+    assigned_subtype TEXT,
+    notes TEXT,
+    extra TEXT
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS tags_by_type ON tags(assigned_type);
+CREATE INDEX IF NOT EXISTS tags_by_frequency ON tags(frequency);
+"""
+BATCH_SIZE = 5000
+
+
+def _row_values(uid, rec):
+    extra = {k: v for k, v in rec.items() if k not in COLUMNS}
+    return (uid,) + tuple(rec.get(k) for k in COLUMNS) + (json.dumps(extra) if extra else None,)
+
+
+def _row_record(row):
+    rec = {k: v for k, v in zip(COLUMNS, row[1:6]) if v is not None}
+    if row[6]:
+        rec.update(json.loads(row[6]))
+    return rec
+
+
+class SqliteTagStore:
+    """Same API as TagStore, backed by an indexed SQLite file in WAL mode"""
+
+    def __init__(self, path):
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self._depth = 0
+        self._lock = threading.RLock()
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+
+    def batch(self):
+        """Group writes into one transaction: `with store.batch(): ...`"""
+        return _Batch(self)
+
+    def _begin(self):
+        """Takes the lock for the whole batch, so other threads' statements can't join the transaction"""
+        self._lock.acquire()
+        try:
+            if self._depth == 0:
+                self.conn.execute("BEGIN")
+            self._depth += 1
+        except:
+            self._lock.release()
+            raise
+
+    def _end(self, ok=True):
+        try:
+            self._depth -= 1
+            if self._depth == 0:
+                self.conn.execute("COMMIT" if ok else "ROLLBACK")
+        finally:
+            self._lock.release()
+
+    def get(self, uid):
+        with self._lock:
+            row = self.conn.execute("SELECT * FROM tags WHERE uid = ?", (uid,)).fetchone()
+            if row:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return _row_record(row) if row else None
+
+    def snapshot(self):
+        with self._lock:
+            rows = self.conn.execute("SELECT * FROM tags").fetchall()
+        return {row[0]: _row_record(row) for row in rows}
+
+    def find(self, assigned_type=None, frequency=None):
+        """UIDs by type and/or frequency (served from the secondary indexes)"""
+        sql, args = "SELECT uid FROM tags WHERE 1", []
+        if assigned_type is not None:
+            sql += " AND assigned_type = ?"
+            args.append(assigned_type)
+        if frequency is not None:
+            sql += " AND frequency = ?"
+            args.append(frequency)
+        with self._lock:
+            return [r[0] for r in self.conn.execute(sql, args)]
+
+    def replace(self, db):
+        with self.batch():
+            self.conn.execute("DELETE FROM tags")
+            self.add_many(db.items())
+
+    def add_many(self, items, replace=True):
+        """Bulk insert (uid, record) pairs in BATCH_SIZE transactions"""
+        verb = "INSERT OR REPLACE" if replace else "INSERT OR IGNORE"
+        sql = f"{verb} INTO tags VALUES (?, ?, ?, ?, ?, ?, ?)"
+        rows = []
+        count = 0
+        for uid, rec in items:
+            rows.append(_row_values(uid, rec))
+            if len(rows) >= BATCH_SIZE:
+                with self.batch():
+                    self.conn.executemany(sql, rows)
+                count += len(rows)
+                rows = []
+        if rows:
+            with self.batch():
+                self.conn.executemany(sql, rows)
+            count += len(rows)
+        return count
+
+    def add_unknown(self, uid, freq, raw):
+        with self._lock:
+            cur = self.conn.execute("INSERT OR IGNORE INTO tags VALUES (?, ?, ?, ?, ?, ?, ?)",
+                                    _row_values(uid, new_record(freq, raw)))
+            return cur.rowcount > 0
+
+    def label(self, uid, tag_type, subtype, notes=""):
+        with self._lock:
+            self.conn.execute(
+                "INSERT INTO tags (uid, assigned_type, assigned_subtype, notes) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(uid) DO UPDATE SET assigned_type = excluded.assigned_type, "
+                "assigned_subtype = excluded.assigned_subtype, notes = excluded.notes",
+                (uid, tag_type, subtype or "Unknown", notes or ""))
+
+    def stats(self):
+        with self._lock:
+            count = self.conn.execute("SELECT COUNT(*) FROM tags").fetchone()[0]
+        total = self.hits + self.misses
+        return {"tags": count, "hits": self.hits, "misses": self.misses,
+                "hit_rate": self.hits / total if total else 0.0}
+
+    def close(self):
+        with self._lock:
+            self.conn.close()
+
+
+class _Batch:
+    def __init__(self, store):
+        self.store = store
+
+    def __enter__(self):
+        self.store._begin()
+        return self.store
+
+    def __exit__(self, exc_type, exc, tb):
+        self.store._end(exc_type is None)
+
+
+def open_store(path):
+    """TagStore for .json paths, SqliteTagStore for .db/.sqlite paths"""
+    if path.lower().endswith(SQLITE_SUFFIXES):
+        return SqliteTagStore(path)
+    return TagStore(path)
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store():
+    """The shared tag store for this process (backend picked from DB_PATH)"""
+    global _store
+    with _store_lock:
+        if _store is None:
+            _store = open_store(DB_PATH)
+        return _store
+
+
+def set_store(store):
+    """Swap the shared store (benchmarks, tools); returns the previous one"""
+    global _store
+    with _store_lock:
+        old, _store = _store, store
+        return old
+
+
+# ==================== LEGACY HELPERS ====================
+def load_db():
+    return get_store().snapshot()
+
+
+def save_db(db):
+    get_store().replace(db)
+
+
+def save_unknown(uid, freq, raw):
+    get_store().add_unknown(uid, freq, raw)
+
+
+# ==================== MIGRATION ====================
+def import_json(json_path, db_path):
+    """One-shot migration: learned_tags.json (+ its journal) -> SQLite"""
+    if not os.path.exists(json_path):
+        raise FileNotFoundError(f"no tag DB at {json_path}")  # TagStore would create an empty one
+    src = TagStore(json_path)
+    dst = SqliteTagStore(db_path)
+    try:
+        return dst.add_many(src.snapshot().items())
+    finally:
+        dst.close()
+
+
+def export_json(db_path, json_path):
+    """Write the SQLite DB back out in the learned_tags.json format"""
+    src = SqliteTagStore(db_path)
+    try:
+        tags = src.snapshot()
+    finally:
+        src.close()
+    dst = TagStore(json_path)
+    try:
+        dst.replace(tags)
+    finally:
+        dst.close()
+    return len(tags)
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Learned tag DB migration (JSON <-> SQLite)")
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    imp = sub.add_parser("import", help="copy a learned_tags.json into a SQLite DB")
+    imp.add_argument("json_path")
+    imp.add_argument("db_path")
+    exp = sub.add_parser("export", help="dump a SQLite DB to learned_tags.json format")
+    exp.add_argument("db_path")
+    exp.add_argument("json_path")
+    args = ap.parse_args(argv)
+    if args.cmd == "import":
+        n = import_json(args.json_path, args.db_path)
+        print(f"Imported {n} tags → {args.db_path}")
+    else:
+        n = export_json(args.db_path, args.json_path)
+        print(f"Exported {n} tags → {args.json_path}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
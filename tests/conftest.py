@@ -0,0 +1,8 @@
+# conftest.py
+# The modules are flat files in the repo root (and the corpus tool in benchmarks/) — make them importable
+import os
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(1, os.path.join(ROOT, "benchmarks"))
@@ -0,0 +1,80 @@
+# test_classifier.py
+# classify_many (NumPy and pure-Python paths) against classify_tag_smart, and UID validation
+import random
+
+import pytest
+
+import classifier
+import tag_store
+from classifier import LearnedIndex, classify_many, classify_tag_smart, is_uid
+
+LEARNED = {"0514439285": {"assigned_type": "Blue Tag", "frequency": "HF"},
+           "abc": {"assigned_type": "Odd", "frequency": "?"},
+           "0000000007": {"assigned_type": "Unknown"}}
+ODD = ["²²²²²²²²²²", "٠١٢٣٤٥٦٧٨٩", "12345", "abc", "", "99999999999", " 1046976037 ", "0000000000", "9999999999"]
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = tag_store.TagStore(str(tmp_path / "learned.json"))
+    s.replace(LEARNED)
+    old = tag_store.set_store(s)
+    yield s
+    tag_store.set_store(old)
+    s.close()
+
+
+@pytest.fixture(params=["numpy", "python"])
+def batch(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+        classifier._load_numpy()
+    else:
+        monkeypatch.setattr(classifier, "np", None)
+        monkeypatch.setattr(classifier, "_numpy_checked", True)
+    return classify_many
+
+
+def test_is_uid():
+    assert is_uid("0514439285")
+    assert not is_uid("²²²²²²²²²²")
+    assert not is_uid("٠١٢٣٤٥٦٧٨٩")
+    assert not is_uid("051443928")
+
+
+def test_batch_matches_single(store, batch):
+    rng = random.Random(5)
+    uids = ODD + list(LEARNED) + [f"{rng.randrange(10 ** 10):010d}" for _ in range(300)]
+    result = batch(uids, LearnedIndex())
+    assert len(result) == len(uids)
+    for uid, *fields in result.rows():
+        single = classify_tag_smart(uid)
+        assert tuple(fields) == tuple(single[f] for f in classifier.FIELDS), uid
+
+
+def test_batch_never_writes(store, batch):
+    batch(["0123456789", "nope"], LearnedIndex())
+    assert set(store.snapshot()) == set(LEARNED)
+
+
+def test_integer_array():
+    np = pytest.importorskip("numpy")
+    result = classify_many(np.array([514439285, 10 ** 10, 2 ** 63 + 1], dtype=np.uint64), LearnedIndex(LEARNED))
+    rows = list(result.rows())
+    assert rows[0][:2] == ("0514439285", "Blue Tag")
+    assert rows[1][0] == "10000000000" and rows[1][1] == rows[2][1] == classifier.RULES.invalid.type
+
+
+def test_empty_batch(batch):
+    assert len(batch([], LearnedIndex(LEARNED))) == 0
+    np = pytest.importorskip("numpy")
+    for dtype in (np.int64, np.uint64, str):
+        result = batch(np.array([], dtype=dtype), LearnedIndex(LEARNED))
+        assert len(result) == 0 and list(result.rows()) == []
+
+
+def test_iterator_input(batch):
+    uids = ["0514439285", "abc", "1046976037"]
+    expected = list(batch(uids, LearnedIndex(LEARNED)).rows())
+    assert list(batch(iter(uids), LearnedIndex(LEARNED)).rows()) == expected
+    assert list(batch((u for u in uids), LearnedIndex(LEARNED)).rows()) == expected
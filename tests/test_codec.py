@@ -0,0 +1,83 @@
+# test_codec.py
+# d4_codec framing, UID extraction and reply matching, plus the recorded corpus
+import random
+
+import pytest
+
+import d4_corpus
+from d4_codec import (CMD_ANTICOLL, CMD_REQA, CMD_SELECT, CMD_UART_MODE, Decoder, answers,
+                      auth_command, encode_frame, extract_uid, uid_frame, uid_to_str)
+
+UID = b"\x12\x34\x56\x78"
+
+
+def test_encode_frame():
+    assert encode_frame(CMD_REQA) == b"\xAA\x01\x20\xBB"
+    assert encode_frame(auth_command(0x60, 4, b"\xff" * 6)) == b"\xAA\x08\x60\x04" + b"\xff" * 6 + b"\xBB"
+
+
+def test_uid_frame_round_trip():
+    frames = Decoder().feed(uid_frame(UID))
+    assert len(frames) == 1
+    assert extract_uid(frames[0].payload) == (UID, "4-byte")
+    assert uid_to_str(UID) == "0305419896"
+
+
+def test_split_feeds_and_garbage():
+    stream = b"\x00\x13garbage" + uid_frame(UID) + b"\xAA\x02\x01\x02\x03\x00" + uid_frame(b"\x01\x02\x03\x04")
+    dec = Decoder()
+    frames = [f for i in range(len(stream)) for f in dec.feed(stream[i:i + 1])]
+    assert [extract_uid(f.payload)[0] for f in frames] == [UID, b"\x01\x02\x03\x04"]
+    assert dec.frames == 2
+    assert dec.skipped > 0 and dec.pending() == 0
+
+
+def test_callback_frames_are_views_valid_during_the_call():
+    seen = []
+    dec = Decoder()
+    result = dec.feed(uid_frame(UID) * 3, lambda f: seen.append((type(f.payload), bytes(f.payload))))
+    assert result is None
+    assert seen == [(memoryview, f.payload) for f in Decoder().feed(uid_frame(UID) * 3)]
+    assert dec.frames == 3
+
+
+def test_raising_callback_does_not_redeliver():
+    dec = Decoder()
+    calls = []
+
+    def boom(frame):
+        calls.append(bytes(frame.raw))
+        if len(calls) == 1:
+            raise RuntimeError
+    with pytest.raises(RuntimeError):
+        dec.feed(uid_frame(UID) + uid_frame(UID), boom)
+    dec.feed(b"", boom)
+    assert len(calls) == 2
+
+
+def test_bare_four_bytes_need_uid_context():
+    assert extract_uid(b"\x21\x00\x00\x00") is None
+    assert extract_uid(b"\x21\x00\x00\x00", raw=True) == (b"\x21\x00\x00\x00", "raw")
+
+
+def test_answers_matches_by_opcode():
+    uid_reply = uid_frame(UID)[2:-1]
+    assert answers(CMD_REQA, uid_reply)
+    assert answers(CMD_ANTICOLL, UID)
+    assert not answers(CMD_SELECT, uid_reply)
+    assert answers(CMD_SELECT, b"\x21\x00")
+    assert not answers(CMD_SELECT, b"\x60\x00")
+    assert answers(CMD_UART_MODE, b"\x10\x01")
+    assert not answers(CMD_REQA, b"")
+
+
+def test_corpus_matches_recording():
+    corpus = d4_corpus.load()
+    assert corpus
+    rng = random.Random(d4_corpus.SEED)
+    for case in corpus:
+        stream = bytes.fromhex(case["stream"])
+        expected = (case["frames"], case["uids"])
+        assert d4_corpus.decode(stream) == expected, case["name"]
+        assert d4_corpus.decode(stream, [stream[i:i + 1] for i in range(len(stream))]) == expected, case["name"]
+        assert d4_corpus.decode(stream, d4_corpus.split(rng, stream)) == expected, case["name"]
@@ -0,0 +1,112 @@
+# test_event_log.py
+# EventLog writer / reader round trips, segment rotation, torn records and the shared name table
+import io
+import os
+import subprocess
+import sys
+import time
+
+import pytest
+
+import event_log
+from event_log import HEADER, RECORD, EventLog, EventLogReader, NameTable, uid_string, uid_value
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_uid_value():
+    assert uid_value("0305419896") == (305419896, 4)
+    assert uid_value("72057594037927935") == (2 ** 56 - 1, 7)
+    assert uid_value("INVALID") == (0, 0)
+    assert uid_value("²²") == (0, 0)
+    assert uid_value(str(1 << 64)) == (0, 0)
+    assert uid_string(5) == "0000000005"
+
+
+def test_round_trip(tmp_path):
+    log = EventLog(str(tmp_path), flush_interval=60)
+    for i in range(10):
+        log.append(f"{i:010d}", "COM3" if i % 2 else "COM4", "MIFARE", wall_ns=i, mono_ns=100 + i)
+    log.append("INVALID", "COM3", "UNKNOWN", wall_ns=10, mono_ns=110)
+    log.close()
+
+    reader = EventLogReader(str(tmp_path))
+    try:
+        events = list(reader.events())
+        assert len(reader) == 11
+        assert [e.uid for e in events[:10]] == list(range(10))
+        assert events[3].mono_ns == 103
+        assert events[10].uid_len == 0
+        assert reader.names.name("readers", events[1].reader) == "COM3"
+        info = reader.summary()
+        assert (info["events"], info["first"], info["last"]) == (11, 0, 10)
+        assert info["readers"] == {"COM4": 5, "COM3": 6}
+    finally:
+        reader.close()
+
+
+def test_rotation_and_torn_record(tmp_path):
+    log = EventLog(str(tmp_path), max_bytes=HEADER.size + 4 * RECORD.size, flush_bytes=RECORD.size)
+    for i in range(10):
+        log.append(f"{i:010d}", "r", "t", wall_ns=i)
+    log.close()
+    assert log.segments == 3
+    names = sorted(f for f in os.listdir(tmp_path) if f.endswith(event_log.SUFFIX))
+    now = time.strftime("%Y%m%d-%H%M%SZ", time.gmtime())  # segment names are UTC
+    assert all(n.startswith("scans-") and n[6:22] <= now and n[21] == "Z" for n in names)
+    last = sorted(f for f in os.listdir(tmp_path) if f.endswith(event_log.SUFFIX))[-1]
+    with open(tmp_path / last, "ab") as f:
+        f.write(b"\x01" * (RECORD.size // 2))  # crash mid-record
+
+    reader = EventLogReader(str(tmp_path))
+    try:
+        assert [e[0] for e in reader] == list(range(10))
+        out = io.StringIO()
+        assert reader.export_csv(out) == 10
+        assert out.getvalue().splitlines()[1].endswith(",r,0000000000,t")
+    finally:
+        reader.close()
+
+
+def test_numpy_view_matches_records(tmp_path):
+    np = pytest.importorskip("numpy")
+    log = EventLog(str(tmp_path))
+    for i in range(5):
+        log.append(f"{i:010d}", "r", "t", wall_ns=i * 7)
+    log.close()
+    reader = EventLogReader(str(tmp_path))
+    try:
+        arr = reader.segments[0].array()
+        assert arr["wall_ns"].tolist() == [0, 7, 14, 21, 28]
+        assert np.all(arr["uid_len"] == 4)
+        del arr
+    finally:
+        reader.close()
+
+
+def test_name_table_is_shared(tmp_path):
+    a, b = NameTable(str(tmp_path)), NameTable(str(tmp_path))
+    assert a.code("readers", "COM3") == 1
+    assert b.code("readers", "COM4") == 2  # re-read under the lock: COM3 already took 1
+    assert a.name("readers", 2) == "COM4"  # unknown code: reloaded
+    assert a.code("readers", None) == 0
+
+
+WORKER = """
+import sys
+sys.path.insert(0, {root!r})
+from event_log import NameTable
+t = NameTable({directory!r})
+print(",".join(str(t.code("readers", f"{{sys.argv[1]}}-{{i}}")) for i in range(15)))
+"""
+
+
+def test_name_codes_across_processes(tmp_path):
+    code = WORKER.format(root=ROOT, directory=str(tmp_path))
+    procs = [subprocess.Popen([sys.executable, "-c", code, str(k)], stdout=subprocess.PIPE, text=True)
+             for k in range(3)]
+    results = [p.communicate(timeout=60)[0].strip().split(",") for p in procs]
+    table = NameTable(str(tmp_path))
+    assert len(table.lists["readers"]) == 1 + 3 * 15
+    for k, codes in enumerate(results):
+        assert [table.name("readers", int(c)) for c in codes] == [f"{k}-{i}" for i in range(15)]
@@ -0,0 +1,57 @@
+# test_headless.py
+# SocketSink: every client gets every line, and a client that stops reading is dropped, not waited for
+import os
+import socket
+import time
+
+import pytest
+
+if not hasattr(socket, "AF_UNIX"):
+    pytest.skip("SocketSink serves a Unix socket", allow_module_levels=True)
+pytest.importorskip("serial")
+
+from d4_headless import SocketSink
+
+
+def connect(sink):
+    """A client the sink has accepted"""
+    known = len(sink.clients)
+    conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    conn.connect(sink.path)
+    deadline = time.monotonic() + 2
+    while len(sink.clients) == known and time.monotonic() < deadline:
+        time.sleep(0.01)
+    return conn
+
+
+def read_lines(conn, n):
+    buf = b""
+    conn.settimeout(2)
+    while buf.count(b"\n") < n:
+        chunk = conn.recv(65536)
+        if not chunk:
+            break
+        buf += chunk
+    return buf.decode().splitlines()
+
+
+def test_slow_client_is_dropped(tmp_path):
+    sink = SocketSink(str(tmp_path / "d4.sock"), backlog=10)
+    try:
+        stalled = connect(sink)
+        line = "x" * 4096 + "\n"  # a few of these fill the socket buffer
+        start = time.monotonic()
+        for _ in range(1000):
+            sink.write(line)
+        assert time.monotonic() - start < 1.0
+        assert sink.dropped == 1 and not sink.clients
+
+        reader = connect(sink)
+        for i in range(5):
+            sink.write(f"{i}\n")
+        assert read_lines(reader, 5) == ["0", "1", "2", "3", "4"]
+        reader.close()
+        stalled.close()
+    finally:
+        sink.close()
+    assert not os.path.exists(tmp_path / "d4.sock")
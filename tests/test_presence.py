@@ -0,0 +1,58 @@
+# test_presence.py
+# PresenceTracker: arrival / heartbeat / departure, on a fake clock
+from presence import ARRIVED, PRESENT, PresenceTracker
+
+
+def test_repeat_reads_are_suppressed():
+    p = PresenceTracker(depart_after=1.0, present_every=5.0)
+    assert p.read("A", "r1", 0.0)[0] == ARRIVED
+    for t in (0.2, 0.4, 0.6):
+        event, tag, departed = p.read("A", "r1", t)
+        assert event is None and departed is None
+    assert tag.reads == 4
+    assert p.stats() == {"present": 1, "reads": 4, "arrivals": 1, "suppressed": 3}
+
+
+def test_same_uid_on_two_readers_is_two_tags():
+    p = PresenceTracker()
+    assert p.read("A", "r1", 0.0)[0] == ARRIVED
+    assert p.read("A", "r2", 0.1)[0] == ARRIVED
+    assert [t.reader for t in p.on_reader("r1")] == ["r1"]
+
+
+def test_present_heartbeat():
+    p = PresenceTracker(depart_after=1.0, present_every=2.0)
+    p.read("A", None, 0.0)
+    events = [p.read("A", None, t / 2)[0] for t in range(1, 9)]
+    assert events.count(PRESENT) == 2
+    assert events[3] == PRESENT  # t = 2.0
+
+
+def test_expire():
+    p = PresenceTracker(depart_after=1.0)
+    p.read("A", None, 0.0)
+    p.read("B", None, 0.5)
+    assert [t.uid for t in p.expire(1.2)] == ["A"]
+    assert [t.uid for t in p.expire(1.6)] == ["B"]
+    assert p.stats()["present"] == 0
+
+
+def test_readd_after_timeout_reports_departure_first():
+    p = PresenceTracker(depart_after=1.0)
+    p.read("A", "r1", 0.0)
+    p.read("A", "r1", 0.5)
+    event, tag, departed = p.read("A", "r1", 3.0)  # lifted and put back before expire() ran
+    assert event == ARRIVED
+    assert departed is not None and departed is not tag
+    assert (departed.reads, departed.first_seen, departed.last_seen) == (2, 0.0, 0.5)
+    assert tag.first_seen == 3.0
+    assert p.expire(3.5) == []
+    assert p.arrivals == 2
+
+
+def test_rate_is_smoothed():
+    p = PresenceTracker(depart_after=1.0)
+    for i in range(20):
+        tag = p.read("A", None, i * 0.1)[1]
+    assert abs(tag.rate - 10.0) < 0.01
+    assert tag.as_dict()["reads"] == 20
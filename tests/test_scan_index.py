@@ -0,0 +1,97 @@
+# test_scan_index.py
+# ScanIndex built from the event log (NumPy and pure-Python paths), lookups, ranges, parse_range and parse_query
+import time
+
+import pytest
+
+import scan_index
+from event_log import EventLog, NameTable
+from scan_index import ScanIndex, parse_query, parse_range, parse_time
+
+SEC = 1_000_000_000
+
+
+@pytest.fixture
+def log_dir(tmp_path):
+    log = EventLog(str(tmp_path))
+    scans = [(5, "0000000001", "COM3"), (1, "0000000002", "COM4"), (3, "0000000001", "COM4"),
+             (4, "INVALID", "COM3"), (9, "0000000003", "COM3"), (7, "0000000001", "COM3")]
+    for sec, uid, reader in scans:  # one out of order, as after a clock step
+        log.append(uid, reader, "MIFARE", wall_ns=sec * SEC)
+    log.close()
+    return str(tmp_path)
+
+
+@pytest.fixture(params=["numpy", "python"])
+def from_log(request, monkeypatch):
+    if request.param == "numpy":
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setattr(scan_index, "np", None)
+        monkeypatch.setattr(scan_index, "_numpy_checked", True)
+    return ScanIndex.from_log
+
+
+def test_from_log(log_dir, from_log):
+    index = from_log(log_dir)
+    assert len(index) == 5  # the INVALID scan is not indexed
+    assert index.lookup("0000000001") == (3 * SEC, 7 * SEC, 3)
+    assert index.lookup("0000000009") is None
+    assert index.lookup("INVALID") is None
+    assert list(index.times) == sorted(index.times)
+
+    total, rows = index.range(3 * SEC, 7 * SEC)
+    assert total == 3
+    assert [(r[0] // SEC, r[1], r[2]) for r in rows] == [(3, "0000000001", "COM4"), (5, "0000000001", "COM3"),
+                                                        (7, "0000000001", "COM3")]
+    assert index.range(0, 10 * SEC, limit=2)[0] == 5
+    assert len(index.range(0, 10 * SEC, limit=2)[1]) == 2
+
+
+def test_until_ns(log_dir, from_log):
+    index = from_log(log_dir, until_ns=5 * SEC)
+    assert len(index) == 2
+    assert index.lookup("0000000001") == (3 * SEC, 3 * SEC, 1)
+
+
+def test_both_paths_agree(log_dir, monkeypatch):
+    pytest.importorskip("numpy")
+    fast = ScanIndex.from_log(log_dir)
+    monkeypatch.setattr(scan_index, "np", None)
+    slow = ScanIndex.from_log(log_dir)
+    assert fast.by_uid == slow.by_uid
+    for column in ("times", "uids", "readers", "types"):
+        assert list(getattr(fast, column)) == list(getattr(slow, column))
+
+
+def test_add_scan_keeps_order(tmp_path):
+    index = ScanIndex(NameTable(str(tmp_path)))
+    index.add_scan("0000000001", "COM3", "MIFARE", wall_ns=10)
+    index.add_scan("0000000002", "COM3", "MIFARE", wall_ns=5)  # clock stepped back
+    index.add_scan("INVALID", "COM3", "UNKNOWN", wall_ns=20)
+    assert list(index.times) == [5, 10]
+    assert index.range(0, 100)[1][0][1:] == ("0000000002", "COM3", "MIFARE")
+
+
+def test_parse_range():
+    day = "2026-10-10"
+    start, end = parse_range("14:00-14:05", day)
+    assert (start, end) == (parse_time("14:00", day), parse_time("14:05", day))
+    assert end - start == 300 * SEC
+    start, end = parse_range("2026-10-10 14:00 - 14:05")
+    assert time.strftime("%Y-%m-%d %H:%M", time.localtime(end // SEC)) == "2026-10-10 14:05"
+    start, end = parse_range("2026-10-10 14:00-2026-10-11 01:00")
+    assert end - start == 11 * 3600 * SEC
+    start, end = parse_range("2026-10-10 14:00")
+    assert end > start
+    with pytest.raises(ValueError):
+        parse_range("yesterday")
+
+
+def test_parse_query():
+    assert parse_query(" 0514439285 ") == ("uid", "0514439285")
+    assert parse_query("72057594037927935") == ("uid", "72057594037927935")  # 7-byte UID
+    assert parse_query("14:00-14:05", "2026-10-10") == ("range", parse_range("14:00-14:05", "2026-10-10"))
+    for text in ("²²²²²²²²²²", "٠١٢٣٤٥٦٧٨٩", "12345"):
+        with pytest.raises(ValueError):
+            parse_query(text)
@@ -0,0 +1,60 @@
+# test_scheduler.py
+# ReqaScheduler: drift-free deadlines, fast polling on activity, backoff and missed slots
+import pytest
+
+from d4_reader import ReqaScheduler
+
+
+def run(sched, until, jitter=0.0):
+    """Fire every deadline up to `until`, each `jitter` late; returns the send times"""
+    sent = []
+    while sched.next_due <= until:
+        now = sched.next_due + jitter
+        sent.append(now)
+        sched.sent(now)
+    return sent
+
+
+def test_deadlines_do_not_drift():
+    s = ReqaScheduler(fast=0.1, slow=0.5)
+    s.start(0.0)
+    assert not s.due(0.49) and s.due(0.5)
+    sent = run(s, 10.0, jitter=0.02)  # always 20 ms late, never accumulates
+    assert len(sent) == 20
+    assert sent[-1] == pytest.approx(10.02)
+    assert s.missed == 0
+
+
+def test_activity_switches_to_fast_then_backs_off():
+    s = ReqaScheduler(fast=0.1, slow=0.8, hold=1.0, backoff=2.0)
+    s.start(0.0)
+    s.activity(0.3)
+    assert s.period == 0.1
+    assert s.next_due == pytest.approx(0.4)  # pulled in, not left at 0.8
+    run(s, 1.3)
+    assert s.period == 0.1  # still within `hold` of the last reply
+    run(s, 3.0)
+    assert s.period == 0.8  # 0.1 → 0.2 → 0.4 → 0.8, capped at slow
+
+
+def test_late_loop_counts_missed_and_restarts():
+    s = ReqaScheduler(fast=0.1, slow=0.5)
+    s.start(0.0)
+    s.sent(2.1)  # deadline was 0.5: 1.6 s late
+    assert s.missed == 3
+    assert s.next_due == pytest.approx(2.6)
+
+
+def test_skipped_slots():
+    s = ReqaScheduler(fast=0.1, slow=0.5)
+    s.start(0.0)
+    s.sent(0.5, skipped=True)
+    s.sent(1.0)
+    snap = s.snapshot()
+    assert (snap["polls"], snap["skipped"], snap["missed"]) == (1, 1, 0)
+    assert snap["period_ms"] == 500
+
+
+def test_slow_is_never_below_fast():
+    s = ReqaScheduler(fast=0.3, slow=0.1)
+    assert s.slow == 0.3 and s.period == 0.3
@@ -0,0 +1,96 @@
+# test_sqlite_store.py
+# SqliteTagStore: round trips, batches, stats and JSON import / export
+import threading
+
+import pytest
+
+from tag_store import SqliteTagStore, TagStore, export_json, import_json, open_store
+
+
+@pytest.fixture
+def store(tmp_path):
+    s = SqliteTagStore(str(tmp_path / "tags.db"))
+    yield s
+    s.close()
+
+
+def test_round_trip(tmp_path, store):
+    assert store.add_unknown("0000000001", "HF 13.56MHz", "raw1")
+    assert not store.add_unknown("0000000001", "LF", "again")
+    store.label("0000000001", "MIFARE Classic 1K", None)
+    store.label("0000000002", "EM410x", "Card", "new via label")
+    store.close()
+
+    s = SqliteTagStore(str(tmp_path / "tags.db"))
+    try:
+        assert s.get("0000000001") == {"raw": "raw1", "frequency": "HF 13.56MHz", "assigned_type": "MIFARE Classic 1K",
+                                       "assigned_subtype": "Unknown", "notes": ""}
+        assert s.get("0000000002")["notes"] == "new via label"
+        assert s.find(assigned_type="EM410x") == ["0000000002"]
+    finally:
+        s.close()
+
+
+def test_extra_fields_survive(store):
+    store.replace({"a": {"assigned_type": "T", "colour": "red"}})
+    assert store.snapshot() == {"a": {"assigned_type": "T", "colour": "red"}}
+
+
+def test_add_many_and_find(store):
+    items = [(f"{i:010d}", {"frequency": "LF" if i % 2 else "HF", "assigned_type": "Unknown"}) for i in range(100)]
+    assert store.add_many(items) == 100
+    assert len(store.find(frequency="LF")) == 50
+    assert store.add_many([("0000000000", {"frequency": "X"})], replace=False) == 1
+    assert store.get("0000000000")["frequency"] == "HF"
+
+
+def test_failed_batch_rolls_back(store):
+    store.add_unknown("keep", "f", "r")
+    with pytest.raises(RuntimeError):
+        with store.batch():
+            store.add_unknown("gone", "f", "r")
+            raise RuntimeError
+    assert set(store.snapshot()) == {"keep"}
+
+
+def test_batch_excludes_other_threads(store):
+    entered, release = threading.Event(), threading.Event()
+    other = threading.Thread(target=lambda: (entered.wait(), store.label("other", "T", "S")))
+    other.start()
+    with pytest.raises(RuntimeError):
+        with store.batch():
+            store.add_unknown("gone", "f", "r")
+            entered.set()
+            other.join(0.2)  # blocked on the batch, so its label can't join our transaction
+            raise RuntimeError
+    other.join()
+    assert set(store.snapshot()) == {"other"}
+
+
+def test_stats(store):
+    store.add_unknown("a", "f", "r")
+    store.get("a")
+    store.get("missing")
+    assert store.stats() == {"tags": 1, "hits": 1, "misses": 1, "hit_rate": 0.5}
+
+
+def test_import_export(tmp_path):
+    src = TagStore(str(tmp_path / "learned.json"))
+    src.add_unknown("1", "f", "r")
+    src.label("2", "T", "S")
+    src.close()
+
+    db = str(tmp_path / "tags.sqlite")
+    assert import_json(str(tmp_path / "learned.json"), db) == 2
+    assert export_json(db, str(tmp_path / "out.json")) == 2
+    assert TagStore(str(tmp_path / "out.json")).snapshot() == TagStore(str(tmp_path / "learned.json")).snapshot()
+
+    with pytest.raises(FileNotFoundError):
+        import_json(str(tmp_path / "missing.json"), db)
+
+
+def test_open_store_picks_backend(tmp_path):
+    s = open_store(str(tmp_path / "x.db"))
+    assert isinstance(s, SqliteTagStore)
+    s.close()
+    assert isinstance(open_store(str(tmp_path / "x.json")), TagStore)
@@ -0,0 +1,137 @@
+# test_tag_store.py
+# TagStore: snapshot + journal round trips, compaction, torn lines, corrupt snapshots and several processes on one file
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+import tag_store
+from tag_store import TagStore
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "tags.json")
+
+
+def test_round_trip(path):
+    s = TagStore(path)
+    assert s.add_unknown("0000000001", "HF 13.56MHz", "raw1")
+    assert not s.add_unknown("0000000001", "LF", "again")
+    s.label("0000000001", "MIFARE Classic 1K", "Blue Tag", "desk")
+    s.close()
+
+    rec = TagStore(path).get("0000000001")
+    assert rec["frequency"] == "HF 13.56MHz"
+    assert (rec["assigned_type"], rec["assigned_subtype"], rec["notes"]) == ("MIFARE Classic 1K", "Blue Tag", "desk")
+
+
+def test_writes_go_to_the_journal_until_compaction(path):
+    s = TagStore(path)
+    s.add_unknown("1", "f", "r")
+    with open(path) as f:
+        assert json.load(f) == {}
+    assert s.stats()["journal_pending"] == 1
+    s.compact()
+    with open(path) as f:
+        assert "1" in json.load(f)
+    assert not os.path.exists(s.journal_path)
+    assert s.stats()["compactions"] == 1
+
+
+def test_background_compaction(path, monkeypatch):
+    monkeypatch.setattr(tag_store, "COMPACT_EVERY", 10)
+    s = TagStore(path)
+    for i in range(25):
+        s.add_unknown(str(i), "f", "r")
+    s.close()
+    assert s.compactions >= 1  # a second one is skipped if the first is still running
+    assert len(TagStore(path).snapshot()) == 25
+
+
+def test_torn_line_is_dropped(path):
+    s = TagStore(path)
+    s.add_unknown("1", "f", "r")
+    s.close()
+    with open(s.journal_path, "ab") as f:
+        f.write(b'{"op":"add","uid":"2","re')  # crash mid-write
+    t = TagStore(path)
+    assert set(t.snapshot()) == {"1"}
+    t.add_unknown("3", "f", "r")
+    t.close()
+    assert set(TagStore(path).snapshot()) == {"1", "3"}
+
+
+def test_corrupt_snapshot_is_kept(path):
+    s = TagStore(path)
+    s.replace({"old": {"assigned_type": "T"}})
+    s.add_unknown("1", "f", "r")
+    s.close()
+    with open(path, "r+") as f:
+        f.truncate(10)  # half-written by something other than TagStore
+    damaged = open(path).read()
+
+    t = TagStore(path)
+    assert set(t.snapshot()) == {"1"}  # the journal still answers
+    t.add_unknown("2", "f", "r")
+    t.compact()
+    t.close()
+    assert open(t.corrupt_path).read() == damaged
+    assert os.path.getsize(t.journal_path) > 0  # nothing folded into the empty stand-in snapshot
+
+    with open(t.corrupt_path, "w") as f:
+        json.dump({"old": {"assigned_type": "T"}}, f)  # repaired by hand...
+    os.replace(t.corrupt_path, path)                   # ...and moved back
+    u = TagStore(path)
+    assert set(u.snapshot()) == {"old", "1", "2"}
+    u.compact()
+    with open(path) as f:
+        assert set(json.load(f)) == {"old", "1", "2"}
+
+
+def test_other_instance_sees_writes(path):
+    a, b = TagStore(path), TagStore(path)
+    assert b.get("x") is None
+    a.add_unknown("x", "f", "r")
+    assert b.get("x") is not None
+    b.compact()
+    a.label("x", "T", "S")
+    assert b.get("x")["assigned_type"] == "T"
+    assert a.stats()["hits"] + a.stats()["misses"] == 2
+
+
+def test_replace(path):
+    s = TagStore(path)
+    s.add_unknown("old", "f", "r")
+    s.replace({"new": {"assigned_type": "T"}})
+    assert TagStore(path).snapshot() == {"new": {"assigned_type": "T"}}
+    assert not os.path.exists(s.journal_path)
+
+
+WORKER = """
+import sys
+sys.path.insert(0, {root!r})
+import tag_store
+tag_store.COMPACT_EVERY = 17
+s = tag_store.TagStore({path!r})
+for i in range({n}):
+    s.add_unknown(f"{{sys.argv[1]}}-{{i}}", "f", "r")
+    if i % 3 == 0:
+        s.label(f"{{sys.argv[1]}}-{{i}}", "T", "S")
+s.close()
+"""
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="timing-heavy; the lock is covered on POSIX")
+def test_several_processes_lose_nothing(path):
+    n = 120
+    code = WORKER.format(root=ROOT, path=path, n=n)
+    procs = [subprocess.Popen([sys.executable, "-c", code, str(k)]) for k in range(3)]
+    assert [p.wait(timeout=120) for p in procs] == [0, 0, 0]
+    tags = TagStore(path).snapshot()
+    assert len(tags) == 3 * n
+    assert all(tags[f"{k}-{i}"].get("assigned_type") == "T" for k in range(3) for i in range(0, n, 3))